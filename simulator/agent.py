@@ -0,0 +1,56 @@
+import json
+import os
+import socket
+import time
+
+from mininet.node import Node
+from minindn.apps.application import Application
+
+DEFAULT_APP_DIR = '/root/prefix-insertion-test/single-machine'
+
+class ProbeAgent(Application):
+    """
+    Runs single-machine/agent.py on the node: one long-lived process with ``faces`` faces to the
+    forwarder that inserts, serves, withdraws and probes prefixes on request over a Unix socket
+    in the node's home directory.
+    """
+    def __init__(self, node, app_dir=DEFAULT_APP_DIR, port=6363, faces=1):
+        Application.__init__(self, node)
+        self.appDir = app_dir
+        self.port = port
+        self.faces = faces
+        self.sockFile = socket_path(node)
+
+    def start(self):
+        Application.start(self, ['python', f'{self.appDir}/agent.py', '--port', str(self.port),
+                                 '--socket', self.sockFile, '--faces', str(self.faces)], logfile='agent.log')
+
+def socket_path(node: Node) -> str:
+    return os.path.join(node.params['params']['homeDir'], 'agent.sock')
+
+def command(node: Node, request: dict, timeout=30) -> list[dict]:
+    """
+    Send one request to the node's agent and return all replies.
+    Waits for the agent to come up if its socket is not there yet.
+    """
+    deadline = time.time() + timeout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        while True:
+            try:
+                sock.connect(socket_path(node))
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.time() > deadline:
+                    raise Exception(f'Agent on {node.name} is not running')
+                time.sleep(0.05)
+
+        sock.settimeout(max(0.1, deadline - time.time()))
+        sock.sendall(json.dumps(request).encode() + b'\n')
+        replies = []
+        with sock.makefile('rb') as f:
+            for line in f:
+                reply = json.loads(line)
+                replies.append(reply)
+                if reply.get('done'):
+                    return replies
+    raise Exception(f'Agent on {node.name} closed the connection')
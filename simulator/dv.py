@@ -1,15 +1,27 @@
 import os
 import json
-import subprocess
+import hashlib
 import shutil
+from datetime import datetime, timedelta, timezone
 
 from minindn.apps.application import Application
 
+import keygen
+
 DEFAULT_NETWORK = '/minindn'
 
 TRUST_ROOT_NAME: str = None
 TRUST_ROOT_PATH = '/tmp/mn-dv-root'
 
+# Compiled from insert.lvs with util/compile_lvs.py --dir simulator
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'insert.tlv')
+
+# Persistent cache of trust roots, schemas and node keys across runs
+CACHE_PATH = '/tmp/mn-dv-cache'
+
+# Nodes whose keys were already written by NDNd_DV.init_all_keys
+KEYS_PREPARED: set[str] = set()
+
 class NDNd_DV(Application):
     config: str
     network: str
@@ -24,7 +36,8 @@ class NDNd_DV(Application):
         if TRUST_ROOT_NAME is None:
             raise Exception('Trust root not initialized (call NDNDV.init_trust first)')
 
-        self.init_keys()
+        if node.name not in KEYS_PREPARED:
+            self.init_keys()
 
         config = {
             'dv': {
@@ -56,15 +69,62 @@ class NDNd_DV(Application):
         Application.start(self, ['ndnd', 'dv', 'run', self.config], logfile='dv.log')
 
     @staticmethod
-    def init_trust(network=DEFAULT_NETWORK) -> None:
+    def init_trust(network=DEFAULT_NETWORK, reuse=True, schema_path=SCHEMA_PATH) -> bool:
+        """
+        Set up the trust root and the prefix insertion schema, ``schema_path`` (a compiled .tlv).
+
+        The root key for a network and the compiled schema are kept in CACHE_PATH, so later
+        runs reuse them (and the node keys cached for them) instead of creating a new root.
+        Pass ``reuse=False`` to force a new root. Returns True if the root came from the cache.
+        """
         global TRUST_ROOT_NAME
-        out = subprocess.check_output(f'ndnd sec keygen {network} ecc secp256r1 > {TRUST_ROOT_PATH}.key', shell=True)
-        out = subprocess.check_output(f'ndnd sec sign-cert {TRUST_ROOT_PATH}.key < {TRUST_ROOT_PATH}.key > {TRUST_ROOT_PATH}.cert', shell=True)
-        out = subprocess.check_output(f'cat {TRUST_ROOT_PATH}.cert | grep "Name:" | cut -d " " -f 2', shell=True)
-        TRUST_ROOT_NAME = out.decode('utf-8').strip()
+        # Keys signed by a previous root are no longer valid
+        KEYS_PREPARED.clear()
+
+        root_dir = os.path.join(CACHE_PATH, 'root', hashlib.sha256(network.encode()).hexdigest()[:32])
+        root_cert = os.path.join(root_dir, 'root.cert')
+        hit = (reuse and os.path.exists(root_cert) and
+               keygen.cert_not_after(root_cert) > datetime.now(timezone.utc) + timedelta(days=1))
+        if not hit:
+            root = keygen.NdndKey.generate(network)
+            tmp_dir = f'{root_dir}.tmp-{os.getpid()}'
+            os.makedirs(tmp_dir, exist_ok=True)
+            with open(os.path.join(tmp_dir, 'root.key'), 'w') as f:
+                f.write(root.to_pem())
+            with open(os.path.join(tmp_dir, 'root.cert'), 'w') as f:
+                f.write(root.sign_cert(root))
+            shutil.rmtree(root_dir, ignore_errors=True)
+            os.rename(tmp_dir, root_dir)
+
+        keygen.link_or_copy(os.path.join(root_dir, 'root.key'), f'{TRUST_ROOT_PATH}.key')
+        keygen.link_or_copy(os.path.join(root_dir, 'root.cert'), f'{TRUST_ROOT_PATH}.cert')
+        TRUST_ROOT_NAME = keygen.cert_name(f'{TRUST_ROOT_PATH}.cert')
+
+        with open(schema_path, 'rb') as f:
+            schema_hash = hashlib.sha256(f.read()).hexdigest()[:32]
+        cached_schema = os.path.join(CACHE_PATH, 'schema', f'{schema_hash}.tlv')
+        if not os.path.exists(cached_schema):
+            os.makedirs(os.path.dirname(cached_schema), exist_ok=True)
+            shutil.copy(schema_path, cached_schema)
+        keygen.link_or_copy(cached_schema, f'{TRUST_ROOT_PATH}-insert.tlv')
+
+        return hit
+
+    @staticmethod
+    def init_all_keys(nodes, network=DEFAULT_NETWORK) -> bool:
+        """
+        Generate the keys of all nodes at once in a process pool, before the apps are created.
+        Results are cached by topology and trust root, see keygen.prepare_keys.
+        Returns True if the keys came from the cache.
+        """
+        if TRUST_ROOT_NAME is None:
+            raise Exception('Trust root not initialized (call NDNDV.init_trust first)')
 
-        schema_path = os.path.join(os.getcwd(), 'insert.tlv')
-        out = subprocess.check_output(f'cp {schema_path} {TRUST_ROOT_PATH}-insert.tlv', shell=True)
+        home_dirs = {node.name: node.params['params']['homeDir'] for node in nodes}
+        hit = keygen.prepare_keys(home_dirs, network, f'{TRUST_ROOT_PATH}.key', f'{TRUST_ROOT_PATH}.cert',
+                                  cache_path=os.path.join(CACHE_PATH, 'keys'))
+        KEYS_PREPARED.update(home_dirs)
+        return hit
 
     def init_keys(self) -> None:
         self.node.cmd(f'rm -rf dv-keys && mkdir -p dv-keys')
@@ -1,4 +1,5 @@
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from mininet.log import info
 from mininet.node import Node
@@ -6,45 +7,101 @@ from mininet.node import Node
 from minindn.minindn import Minindn
 from minindn.apps.app_manager import AppManager
 
-from dv import NDNd_DV, DEFAULT_NETWORK
+from dv import NDNd_DV, DEFAULT_NETWORK, SCHEMA_PATH
 
-def setup(ndn: Minindn, network=DEFAULT_NETWORK, pi_security=False, hosts: list[Node] = None) -> None:
+def setup(ndn: Minindn, network=DEFAULT_NETWORK, pi_security=False, hosts: list[Node] = None,
+          schema_path=SCHEMA_PATH) -> AppManager:
     time.sleep(1) # wait for fw to start
 
-    NDNd_DV.init_trust()
-    info('Starting ndn-dv on nodes\n')
+    start = time.time()
+    root_cached = NDNd_DV.init_trust(network=network, schema_path=schema_path)
 
     if hosts is None:
         hosts = ndn.net.hosts
 
-    AppManager(ndn, hosts, NDNd_DV, network=network, pi_security=pi_security)
+    keys_cached = NDNd_DV.init_all_keys(hosts, network=network)
+    info(f'Trust root and keys ready in {time.time() - start:.3f}s '
+         f'(root {"cached" if root_cached else "new"}, node keys {"cached" if keys_cached else "new"})\n')
+
+    info('Starting ndn-dv on nodes\n')
+    return AppManager(ndn, hosts, NDNd_DV, network=network, pi_security=pi_security)
+
+def converge(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK, use_nfdc=False, interval=0.1) -> float:
+    report = converge_report(nodes, deadline=deadline, network=network, use_nfdc=use_nfdc, interval=interval)
+    return report['total_ms'] / 1000
+
+def converge_report(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK, use_nfdc=False, interval=0.1,
+                    prefixes: list[str] = None, absent=False, start: float = None) -> dict:
+    """
+    Poll every node's routes concurrently until each node has a route for every prefix,
+    or with ``absent``, until no node has a route for any of them.
 
-def converge(nodes: list[Node], deadline=30, network=DEFAULT_NETWORK, use_nfdc=False) -> int:
+    By default the prefixes are the router prefixes of all nodes.
+    Returns the total convergence time and, per node, the time at which the node
+    converged and at which each prefix first appeared (or disappeared), all in milliseconds
+    since ``start`` (a time.time() value, by default when polling starts).
+    """
     info('Waiting for routing to converge\n')
-    start = time.time()
-    while time.time() - start < deadline:
-        time.sleep(1)
-        if is_converged(nodes, network=network, use_nfdc=use_nfdc):
-            total = round(time.time() - start)
-            info(f'Routing converged in {total} seconds\n')
-            return total
+    if prefixes is None:
+        prefixes = [f'{network}/{node.name}' for node in nodes]
+    if start is None:
+        start = time.time()
+
+    first_seen: dict[str, dict[str, float]] = {node.name: {} for node in nodes}
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(nodes)))) as executor:
+        while time.time() - start < deadline:
+            pending = [node for node in nodes if len(first_seen[node.name]) < len(prefixes)]
+            for node, routes in zip(pending, executor.map(lambda n: route_set(n, use_nfdc), pending)):
+                now_ms = (time.time() - start) * 1000
+                for prefix in prefixes:
+                    if prefix not in first_seen[node.name] and (prefix in routes) != absent:
+                        first_seen[node.name][prefix] = now_ms
+
+            missing = {node.name: len(prefixes) - len(first_seen[node.name]) for node in nodes}
+            if not any(missing.values()):
+                node_ms = {name: max(seen.values(), default=0.0) for name, seen in first_seen.items()}
+                total = max(node_ms.values(), default=0.0)
+                info(f'Routing converged in {total / 1000:.3f} seconds\n')
+                for name, ms in sorted(node_ms.items(), key=lambda item: item[1]):
+                    info(f'  {name}: {ms:.0f} ms\n')
+                return {'total_ms': total, 'nodes': node_ms, 'prefixes': first_seen}
+
+            n_nodes = sum(1 for n in missing.values() if n)
+            info(f'Routing not converged on {n_nodes} nodes ({sum(missing.values())} routes '
+                 f'{"remaining" if absent else "missing"})\n')
+            time.sleep(interval)
 
     raise Exception('Routing did not converge')
 
+def route_set(node: Node, use_nfdc=False) -> set[str]:
+    """
+    Return every route prefix on the node, together with all of its ancestors,
+    so that membership tests for a prefix also match longer routes under it.
+    """
+    if use_nfdc:
+        # NFD returns status datasets without a FinalBlockId.
+        # We don't support that.
+        routes = node.cmd('nfdc route list')
+    else:
+        routes = node.cmd('ndnd fw route-list')
+
+    names = set()
+    for token in routes.split():
+        if '=' in token and not token.startswith('/'):
+            token = token.split('=', 1)[1]
+        if not token.startswith('/'):
+            continue
+        components = token.rstrip('/').split('/')
+        for i in range(2, len(components) + 1):
+            names.add('/'.join(components[:i]))
+    return names
+
 def is_converged(nodes: list[Node], network=DEFAULT_NETWORK, use_nfdc=False) -> bool:
-    converged = True
-    for node in nodes:
-        if use_nfdc:
-            # NFD returns status datasets without a FinalBlockId.
-            # We don't support that.
-            routes = node.cmd('nfdc route list')
-        else:
-            routes = node.cmd('ndnd fw route-list')
-        for other in nodes:
-            if f'{network}/{other.name}' not in routes:
-                info(f'Routing not converged on {node.name} for {other.name}\n')
-                converged = False
-                break # break out of inner loop
-        if not converged:
-            return False
-    return converged
+    prefixes = [f'{network}/{other.name}' for other in nodes]
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(nodes)))) as executor:
+        for node, routes in zip(nodes, executor.map(lambda n: route_set(n, use_nfdc), nodes)):
+            for prefix in prefixes:
+                if prefix not in routes:
+                    info(f'Routing not converged on {node.name} for {prefix}\n')
+                    return False
+    return True
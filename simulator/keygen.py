@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from Cryptodome.PublicKey import ECC
+from ndn.app_support.security_v2 import new_cert, parse_certificate
+from ndn.encoding import Component, MetaInfo, Name, make_data, parse_data
+from ndn.security import Sha256WithEcdsaSigner
+
+# Key and cert files are read back with the ndnd file parser of the single-machine scripts,
+# which the simulator already runs on every host
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'single-machine'))
+from cert_util import read_ndnd_cert, read_ndnd_key
+
+KEY_CACHE_PATH = '/tmp/mn-dv-cache/keys'
+
+CERT_VALIDITY = timedelta(days=365)
+
+# ndnd stores private keys as a self-signed Data packet of this ContentType
+CONTENT_TYPE_SECRET = 9
+
+
+class NdndKey:
+    """
+    An ECDSA P-256 key in the form `ndnd sec keygen` writes it
+    """
+    def __init__(self, name, der: bytes):
+        self.name = Name.normalize(name)
+        self.der = bytes(der)
+        self.signer = Sha256WithEcdsaSigner(self.name, self.der)
+
+    @staticmethod
+    def generate(identity: str) -> 'NdndKey':
+        key = ECC.generate(curve='P-256')
+        name = Name.from_str(identity) + [Component.from_str('KEY'), Component.from_bytes(os.urandom(8))]
+        return NdndKey(name, key.export_key(format='DER', use_pkcs8=False))
+
+    @staticmethod
+    def load(path: str) -> 'NdndKey':
+        name, _, der, _ = parse_data(read_ndnd_key(path)['key_data'])
+        return NdndKey(name, der)
+
+    def public_der(self) -> bytes:
+        return ECC.import_key(self.der).public_key().export_key(format='DER')
+
+    def to_pem(self) -> str:
+        wire = make_data(self.name, MetaInfo(content_type=CONTENT_TYPE_SECRET), self.der, signer=self.signer)
+        return _to_pem('KEY', [('Name', Name.to_str(self.name)), ('SigType', 'Sha256WithEcdsa')], wire)
+
+    def sign_cert(self, key: 'NdndKey', start: datetime = None) -> str:
+        """
+        Issue a certificate for ``key`` signed by this key, as `ndnd sec sign-cert` would
+        """
+        start = start if start is not None else datetime.now(timezone.utc).replace(microsecond=0)
+        end = start + CERT_VALIDITY
+        cert_name, wire = new_cert(key.name, Component.from_str('NA'), key.public_der(), self.signer,
+                                   start, end)
+        validity = f'{start:%Y-%m-%d %H:%M:%S} +0000 UTC - {end:%Y-%m-%d %H:%M:%S} +0000 UTC'
+        return _to_pem('CERT', [('Name', Name.to_str(cert_name)), ('SigType', 'Sha256WithEcdsa'),
+                                ('SignerKey', Name.to_str(self.name)), ('Validity', validity)], wire)
+
+
+def cert_name(path: str) -> str:
+    return Name.to_str(parse_certificate(read_ndnd_cert(path)['cert_data']).name)
+
+
+def cert_not_after(path: str) -> datetime:
+    validity = parse_certificate(read_ndnd_cert(path)['cert_data']).signature_info.validity_period
+    return datetime.strptime(bytes(validity.not_after).decode(), '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc)
+
+
+def _to_pem(kind: str, headers: list[tuple[str, str]], wire) -> str:
+    b64 = base64.b64encode(bytes(wire)).decode()
+    lines = [f'-----BEGIN NDN {kind}-----']
+    lines += [f'{field}: {value}' for field, value in headers]
+    lines.append('')
+    lines += [b64[i:i + 64] for i in range(0, len(b64), 64)]
+    lines.append(f'-----END NDN {kind}-----')
+    return '\n'.join(lines) + '\n'
+
+
+def _generate_node_files(network: str, node: str, root_name: bytes, root_der: bytes) -> dict[str, str]:
+    root = NdndKey(Name.from_bytes(root_name), root_der)
+
+    dv_key = NdndKey.generate(f'{network}/{node}/32=DV')
+    insert_key = NdndKey.generate(f'{network}/{node}/insert')
+    client_key = NdndKey.generate(f'{network}/{node}/insert/client')
+
+    return {
+        f'dv-keys/{node}.key': dv_key.to_pem(),
+        f'dv-keys/{node}.cert': root.sign_cert(dv_key),
+        f'dv-keys/{node}-insert.key': insert_key.to_pem(),
+        f'dv-keys/{node}-insert.cert': root.sign_cert(insert_key),
+        f'client-keys/{node}-client.key': client_key.to_pem(),
+        f'client-keys/{node}-client.cert': insert_key.sign_cert(client_key),
+    }
+
+
+def cache_key(network: str, nodes: list[str], root_cert_path: str) -> str:
+    h = hashlib.sha256()
+    h.update(network.encode())
+    with open(root_cert_path, 'rb') as f:
+        h.update(f.read())
+    for node in sorted(nodes):
+        h.update(b'\0' + node.encode())
+    return h.hexdigest()[:32]
+
+
+def prepare_keys(home_dirs: dict[str, str], network: str, root_key_path: str, root_cert_path: str,
+                 cache_path: str = KEY_CACHE_PATH, max_workers: int = None) -> bool:
+    """
+    Write DV, insert and client keys and certs for every node into its home directory.
+
+    ``home_dirs`` maps node names to home directories. Keys are generated in a process pool
+    and kept in a cache keyed by network, node names and trust root cert, so a repeat run
+    with the same topology and trust root only copies files. Returns True on a cache hit.
+    """
+    cache_dir = os.path.join(cache_path, cache_key(network, list(home_dirs), root_cert_path))
+    hit = os.path.isdir(cache_dir)
+
+    if not hit:
+        root = NdndKey.load(root_key_path)
+        root_name = bytes(Name.to_bytes(root.name))
+        nodes = sorted(home_dirs)
+        with ProcessPoolExecutor(max_workers) as executor:
+            results = executor.map(_generate_node_files, [network] * len(nodes), nodes,
+                                   [root_name] * len(nodes), [root.der] * len(nodes))
+            files = dict(zip(nodes, results))
+
+        tmp_dir = f'{cache_dir}.tmp-{os.getpid()}'
+        for node, node_files in files.items():
+            for rel_path, content in node_files.items():
+                path = os.path.join(tmp_dir, node, rel_path)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w') as f:
+                    f.write(content)
+        os.makedirs(cache_path, exist_ok=True)
+        os.rename(tmp_dir, cache_dir)
+
+    for node, home_dir in home_dirs.items():
+        for sub_dir in ('dv-keys', 'client-keys'):
+            shutil.rmtree(os.path.join(home_dir, sub_dir), ignore_errors=True)
+            shutil.copytree(os.path.join(cache_dir, node, sub_dir), os.path.join(home_dir, sub_dir),
+                            copy_function=link_or_copy)
+        link_or_copy(root_cert_path, os.path.join(home_dir, 'dv-keys', os.path.basename(root_cert_path)))
+
+    return hit
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    """
+    Hard-link ``src`` to ``dst``, replacing ``dst``; copy instead across file systems
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mininet.log import setLogLevel, info
+from mininet.node import Node
+from minindn.minindn import Minindn
+from minindn.apps.app_manager import AppManager
+
+from fw import NDNd_FW
+import agent
+import dv_util
+import telemetry
+
+DEFAULT_STEPS = [1, 10, 100, 1000, 10000]
+
+
+def insert_all(producers: list[Node], count: int, window: int, timeout: float) -> tuple[list[str], list[dict]]:
+    """
+    Split ``count`` prefixes over the producers and insert them in parallel, one batch per producer
+    """
+    batches = {host: [f'/scale/{host.name}/{i}' for i in range(k, count, len(producers))]
+               for k, host in enumerate(producers)}
+
+    def insert(host: Node) -> dict:
+        request = {'cmd': 'insert_batch', 'prefixes': batches[host], 'window': window}
+        return agent.command(host, request, timeout=timeout)[-1]
+
+    with ThreadPoolExecutor(max_workers=len(producers)) as executor:
+        replies = list(executor.map(insert, producers))
+    return [prefix for batch in batches.values() for prefix in batch], replies
+
+
+def withdraw_all(producers: list[Node], window: int, timeout: float) -> None:
+    def withdraw(host: Node) -> dict:
+        return agent.command(host, {'cmd': 'withdraw_batch', 'window': window}, timeout=timeout)[-1]
+
+    with ThreadPoolExecutor(max_workers=len(producers)) as executor:
+        for host, reply in zip(producers, executor.map(withdraw, producers)):
+            if reply.get('failed') or 'error' in reply:
+                info(f'{host.name}: withdrawal incomplete: {reply.get("error") or len(reply["failed"])}\n')
+
+
+def resource_summary(rows: list[dict], phase: str) -> dict:
+    """
+    Peak and mean RSS and CPU utilization during a phase per process role, from the rows of
+    telemetry.summarize_samples. Peaks are the highest of any node, means are averaged over
+    the nodes, and cpu_total adds up the nodes' mean utilization.
+    """
+    summary = {}
+    for role in sorted({row['role'] for row in rows}):
+        nodes = [row for row in rows if row['role'] == role and row['phase'] == phase]
+        summary[role] = {
+            'rss_peak_mb': max((row['rss_peak_mb'] for row in nodes), default=0.0),
+            'rss_mean_mb': sum(row['rss_mean_mb'] for row in nodes) / len(nodes) if nodes else 0.0,
+            'cpu_peak': max((row['cpu_peak'] for row in nodes), default=0.0),
+            'cpu_mean': sum(row['cpu_mean'] for row in nodes) / len(nodes) if nodes else 0.0,
+            'cpu_total': sum(row['cpu_mean'] for row in nodes),
+        }
+    return summary
+
+
+def run_step(hosts: list[Node], producers: list[Node], apps: dict[str, AppManager], count: int,
+             args: argparse.Namespace) -> dict:
+    info(f'--- {count} prefixes from {len(producers)} producers\n')
+    # RSS and CPU of every ndnd process are sampled from /proc throughout the step
+    sampler = telemetry.Sampler(args.sample_interval)
+    for role, manager in apps.items():
+        sampler.add(role, manager)
+    sampler.phase('insert')
+    sampler.start()
+    try:
+        start = time.time()
+        prefixes, replies = insert_all(producers, count, args.window, args.deadline)
+        insert_s = time.time() - start
+        errors = [reply['error'] for reply in replies if 'error' in reply]
+        n_ok = sum(reply.get('ok', 0) for reply in replies)
+        if errors or n_ok < count:
+            raise Exception(f'Only {n_ok} of {count} insertions succeeded {errors or ""}')
+
+        report = dv_util.converge_report(hosts, deadline=args.deadline, interval=args.interval,
+                                         prefixes=prefixes, start=start)
+        result = {
+            'prefixes': count,
+            'producers': len(producers),
+            'insert_s': insert_s,
+            'insert_per_s': count / insert_s,
+            'fib_complete_ms': report['total_ms'],
+        }
+
+        sampler.phase('withdraw')
+        start = time.time()
+        withdraw_all(producers, args.window, args.deadline)
+        dv_util.converge_report(hosts, deadline=args.deadline, interval=args.interval,
+                                prefixes=prefixes, absent=True, start=start)
+        result['withdraw_complete_ms'] = (time.time() - start) * 1000
+    finally:
+        sampler.stop()
+
+    rows = telemetry.summarize_samples(sampler.columns, sampler.meta())
+    result['resources'] = resource_summary(rows, 'insert')
+    result['withdraw_resources'] = resource_summary(rows, 'withdraw')
+
+    info(f'{count} prefixes: {result["insert_per_s"]:.0f} insertions/s, all FIBs complete after '
+         f'{result["fib_complete_ms"]:.0f} ms, withdrawn after {result["withdraw_complete_ms"]:.0f} ms\n')
+    for role, summary in result['resources'].items():
+        info(f'  ndnd {role} while inserting: RSS peak {summary["rss_peak_mb"]:.1f} MB mean '
+             f'{summary["rss_mean_mb"]:.1f} MB, CPU peak {summary["cpu_peak"]:.2f} mean {summary["cpu_mean"]:.2f} '
+             f'total {summary["cpu_total"]:.2f} cores\n')
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure how insertion throughput, FIB convergence and ndnd '
+                                                 'resource use scale with the number of inserted prefixes')
+    parser.add_argument('--steps', nargs='+', type=int, default=DEFAULT_STEPS,
+                        help=f'Prefix counts to insert (default: {" ".join(map(str, DEFAULT_STEPS))})')
+    parser.add_argument('--producers', type=int, default=1,
+                        help='Number of hosts inserting prefixes, the first N hosts (default: 1)')
+    parser.add_argument('--window', type=int, default=64,
+                        help='Insertions in flight per producer (default: 64)')
+    parser.add_argument('--deadline', type=float, default=300,
+                        help='Seconds to wait for each step to insert and propagate (default: 300)')
+    parser.add_argument('--interval', type=float, default=0.1,
+                        help='FIB polling interval in seconds (default: 0.1)')
+    parser.add_argument('--sample-interval', type=float, default=0.2,
+                        help='Seconds between RSS/CPU samples of the ndnd processes (default: 0.2)')
+    parser.add_argument('--app-dir', default=agent.DEFAULT_APP_DIR,
+                        help=f'Directory with the agent script (default: {agent.DEFAULT_APP_DIR})')
+    parser.add_argument('--results', default='prefix_scale.json',
+                        help='Write step results to this JSON file (default: prefix_scale.json)')
+
+    setLogLevel('info')
+
+    Minindn.cleanUp()
+    Minindn.verifyDependencies()
+
+    ndn = Minindn(parser=parser)
+    args = ndn.args
+
+    ndn.start()
+    results = []
+    try:
+        hosts = ndn.net.hosts
+        producers = hosts[:args.producers]
+
+        info('Starting forwarder on nodes\n')
+        apps = {'fw': AppManager(ndn, hosts, NDNd_FW)}
+        apps['dv'] = dv_util.setup(ndn)
+        dv_util.converge(hosts)
+
+        info('Starting probe agents on producers\n')
+        AppManager(ndn, producers, agent.ProbeAgent, app_dir=args.app_dir)
+
+        for count in args.steps:
+            try:
+                results.append(run_step(hosts, producers, apps, count, args))
+            except Exception as e:
+                info(f'Step with {count} prefixes failed: {e}\n')
+                results.append({'prefixes': count, 'producers': len(producers), 'error': str(e)})
+                break
+    finally:
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=4)
+
+        # kill everything we started just in case ...
+        os.system('pkill -9 ndnd')
+        ndn.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from mininet.log import info
+from mininet.node import Node
+
+import agent
+
+
+def probe_all(hosts: list[Node], name: str, count=1, lifetime=6000, timeout=30) -> list[dict]:
+    """
+    Have the agent on every host express ``count`` Interests for ``name`` at the same time.
+
+    Returns one record per Interest with the host name, Interest name, outcome (data, nack,
+    timeout, canceled, invalid or error) and RTT in milliseconds, grouped in the order of ``hosts``.
+    With ``count`` > 1, Interest i is sent for ``<name>/i``.
+    """
+    template = name if count == 1 else name.rstrip('/') + '/{i}'
+    request = {'cmd': 'express', 'template': template, 'count': count, 'lifetime': lifetime}
+
+    def probe(host: Node) -> list[dict]:
+        try:
+            replies = agent.command(host, request, timeout=timeout)
+        except Exception as e:
+            return [{'host': host.name, 'name': name, 'outcome': 'error', 'rtt_ms': None, 'error': str(e)}]
+        if 'error' in replies[-1]:
+            return [{'host': host.name, 'name': name, 'outcome': 'error', 'rtt_ms': None,
+                     'error': replies[-1]['error']}]
+        return [{'host': host.name} | reply for reply in replies[:-1]]
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=min(64, len(hosts) or 1)) as executor:
+        records = [record for records in executor.map(probe, hosts) for record in records]
+
+    outcomes = Counter(record['outcome'] for record in records)
+    info(f'Probed {len(hosts)} hosts in {time.time() - start:.2f}s: '
+         + ', '.join(f'{outcome}={n}' for outcome, n in sorted(outcomes.items())) + '\n')
+    return records
@@ -0,0 +1,44 @@
+import os
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+def read(pid: int) -> dict:
+    """
+    CPU time (user + system, seconds) and RSS (bytes) of a process from /proc/<pid>/stat
+    """
+    with open(f'/proc/{pid}/stat', 'rb') as f:
+        stat = f.read()
+    # The command name may contain spaces, so fields are counted from its closing parenthesis
+    fields = stat[stat.rindex(b')') + 2:].split()
+    return {
+        'cpu_s': (int(fields[11]) + int(fields[12])) / CLOCK_TICKS,
+        'rss': int(fields[21]) * PAGE_SIZE,
+    }
+
+
+def read_all(pid: int) -> dict:
+    """
+    read() plus context switches from /proc/<pid>/status and storage I/O from /proc/<pid>/io.
+    I/O counters are 0 when /proc/<pid>/io is not readable.
+    """
+    sample = read(pid)
+    with open(f'/proc/{pid}/status', 'rb') as f:
+        for line in f:
+            if line.startswith(b'voluntary_ctxt_switches'):
+                sample['voluntary_ctxt'] = int(line.split()[1])
+            elif line.startswith(b'nonvoluntary_ctxt_switches'):
+                sample['nonvoluntary_ctxt'] = int(line.split()[1])
+    sample['read_bytes'] = sample['write_bytes'] = 0
+    try:
+        with open(f'/proc/{pid}/io', 'rb') as f:
+            for line in f:
+                if line.startswith(b'read_bytes'):
+                    sample['read_bytes'] = int(line.split()[1])
+                elif line.startswith(b'write_bytes'):
+                    sample['write_bytes'] = int(line.split()[1])
+    except PermissionError:
+        pass
+    return sample
+
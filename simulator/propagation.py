@@ -0,0 +1,79 @@
+import csv
+import time
+
+from mininet.log import info
+from mininet.node import Node
+
+import agent
+import dv_util
+
+# Route polling interval; each round runs `ndnd fw route-list` on all pending nodes in parallel
+POLL_INTERVAL = 0.01
+
+
+def measure_insert(producer: Node, nodes: list[Node], request: dict, deadline=30,
+                   interval=POLL_INTERVAL, use_nfdc=False) -> dict:
+    """
+    Insert a prefix through the producer's agent and poll every node's FIB until it has
+    a route for the prefix. Returns the insertion RTT and the per-node propagation latency,
+    both in milliseconds since the insertion was sent.
+    """
+    return _measure(producer, nodes, request, False, deadline, interval, use_nfdc)
+
+
+def measure_withdraw(producer: Node, nodes: list[Node], prefix: str, deadline=30,
+                     interval=POLL_INTERVAL, use_nfdc=False) -> dict:
+    """
+    Withdraw a prefix through the producer's agent and poll every node's FIB until the
+    route is gone, like measure_insert.
+    """
+    return _measure(producer, nodes, {'cmd': 'withdraw', 'prefix': prefix}, True, deadline, interval, use_nfdc)
+
+
+def _measure(producer: Node, nodes: list[Node], request: dict, absent: bool, deadline: float,
+             interval: float, use_nfdc: bool) -> dict:
+    start = time.time()
+    reply = agent.command(producer, request)[-1]
+    if not reply.get('ok'):
+        raise Exception(f'{request["cmd"].capitalize()} of {request["prefix"]} failed: {reply}')
+
+    report = dv_util.converge_report(nodes, deadline=deadline, use_nfdc=use_nfdc, interval=interval,
+                                     prefixes=[request['prefix']], absent=absent, start=start)
+    latencies = report['nodes']
+    summary = summarize(list(latencies.values()))
+    info(f'{request["cmd"].capitalize()} of {request["prefix"]} reached {len(latencies)} nodes: '
+         + ' '.join(f'{key}={value:.0f}ms' for key, value in summary.items()) + '\n')
+    return {'rtt_ms': reply['elapsed_ms'], 'nodes': latencies, 'summary': summary}
+
+
+def cdf(latencies: list[float]) -> list[tuple[float, float]]:
+    """
+    Empirical CDF as (latency, fraction of nodes reached by then) points
+    """
+    values = sorted(latencies)
+    return [(value, (i + 1) / len(values)) for i, value in enumerate(values)]
+
+
+def summarize(latencies: list[float]) -> dict:
+    values = sorted(latencies)
+    if not values:
+        return {}
+    def percentile(p: float) -> float:
+        return values[min(len(values) - 1, int(p / 100 * len(values)))]
+    return {'min': values[0], 'p50': percentile(50), 'p90': percentile(90), 'p99': percentile(99), 'max': values[-1]}
+
+
+def write_csv(path: str, results: list[dict]) -> None:
+    """
+    Write one row per scenario, phase and node, with the propagation latency and its CDF value
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['scenario', 'pi_security', 'prefix', 'phase', 'node', 'latency_ms', 'cdf'])
+        for result in results:
+            for phase in ('insert', 'withdraw'):
+                latencies = result.get(phase, {}).get('nodes', {})
+                fractions = dict(cdf(list(latencies.values())))
+                for node, ms in sorted(latencies.items(), key=lambda item: item[1]):
+                    writer.writerow([result['name'], result.get('pi_security'), result.get('prefix'), phase,
+                                     node, f'{ms:.1f}', f'{fractions[ms]:.4f}'])
@@ -0,0 +1,226 @@
+import argparse
+import json
+import os
+import random
+import time
+
+from mininet.log import setLogLevel, info
+from mininet.node import Node
+from minindn.minindn import Minindn
+from minindn.apps.app_manager import AppManager
+
+from fw import NDNd_FW
+import agent
+import dv_util
+from dv import SCHEMA_PATH
+import probe
+import propagation
+import telemetry
+
+DEFAULT_SCENARIO = {
+    'dv_hosts': 'all',                      # 'all' or 'exclude-producer'
+    'pi_security': False,
+    'forwarder_only_default_route': False,  # default route / from the producer to its neighbors
+    'converge_deadline': 30,
+    'ready_deadline': 30,                   # for the prefix to reach, or leave, every consumer
+    'producer': {
+        'host': 0,
+        'prefix': '/foo/bar/baz',           # may contain {node}, the producer host name
+        'also_register': False,
+        'use_client_keys': False,           # sign with the client key generated for the producer host
+    },
+}
+
+
+def load_scenarios(path: str) -> list[dict]:
+    """
+    Load a list of scenarios from a JSON or YAML file, filling in defaults
+    """
+    with open(path, 'r') as f:
+        if path.endswith(('.yml', '.yaml')):
+            try:
+                import yaml
+            except ImportError:
+                raise Exception('PyYAML is required to load YAML scenarios, use JSON instead')
+            specs = yaml.safe_load(f)
+        else:
+            specs = json.load(f)
+
+    scenarios = []
+    for spec in specs:
+        if 'name' not in spec:
+            raise Exception(f'Scenario without a name in {path}')
+        scenario = DEFAULT_SCENARIO | spec
+        scenario['producer'] = DEFAULT_SCENARIO['producer'] | spec.get('producer', {})
+        scenarios.append(scenario)
+    return scenarios
+
+
+def add_default_route(host: Node) -> None:
+    for intf in host.intfList():
+        other_intf = intf.link.intf2 if intf.link.intf1 == intf else intf.link.intf1
+        cmd = f'ndnd fw route-add prefix=/ origin=129 face=udp4://{other_intf.IP()}:6363'
+        info(f'{host.name}: {cmd}\n{host.cmd(cmd)}\n')
+
+
+def insert_request(host: Node, producer: dict) -> dict:
+    prefix = '/' + producer['prefix'].format(node=host.name).lstrip('/')
+    request = {'cmd': 'insert', 'prefix': prefix, 'also_register': producer['also_register']}
+    if producer['use_client_keys']:
+        key_dir = os.path.join(host.params['params']['homeDir'], 'client-keys')
+        request |= {'key_path': f'{key_dir}/{host.name}-client.key',
+                    'cert_path': f'{key_dir}/{host.name}-client.cert'}
+    return request
+
+
+def run_scenario(ndn: Minindn, scenario: dict, app_dir: str, telemetry_dir: str = None,
+                 telemetry_interval: float = 0.5, schema_path: str = SCHEMA_PATH) -> dict:
+    """
+    Run one scenario on the running network and return its timings and probe output.
+    Apps started by the scenario are cleaned up afterwards, but the network is kept.
+    With ``telemetry_dir``, ndnd resource use is sampled into <telemetry_dir>/<scenario>.npz.
+    ``schema_path`` is the compiled prefix insertion schema used by pi_security scenarios.
+    """
+    info(f"===================================================\n")
+    info(f"Scenario {scenario['name']}\n")
+    random.seed(0)
+    start = time.time()
+    result = {'name': scenario['name'], 'pi_security': scenario['pi_security']}
+    prefix = None
+
+    producer = scenario['producer']
+    producer_host = ndn.net.hosts[producer['host']]
+    if scenario['dv_hosts'] == 'exclude-producer':
+        dv_hosts = [host for host in ndn.net.hosts if host is not producer_host]
+    else:
+        dv_hosts = ndn.net.hosts
+    consumers = [host for host in ndn.net.hosts if host is not producer_host]
+    sampler = telemetry.Sampler(telemetry_interval) if telemetry_dir else None
+
+    try:
+        info('Starting forwarder on nodes\n')
+        fw_apps = AppManager(ndn, ndn.net.hosts, NDNd_FW)
+        if sampler is not None:
+            sampler.add('fw', fw_apps)
+            sampler.phase('setup')
+            sampler.start()
+
+        dv_apps = dv_util.setup(ndn, pi_security=scenario['pi_security'], hosts=dv_hosts,
+                                schema_path=schema_path)
+        result['setup_s'] = time.time() - start
+        if sampler is not None:
+            sampler.add('dv', dv_apps)
+            sampler.phase('converge')
+        result['converge_ms'] = dv_util.converge(dv_hosts, deadline=scenario['converge_deadline']) * 1000
+
+        info('Starting probe agents on nodes\n')
+        AppManager(ndn, ndn.net.hosts, agent.ProbeAgent, app_dir=app_dir)
+
+        if scenario['forwarder_only_default_route']:
+            add_default_route(producer_host)
+
+        insert = insert_request(producer_host, producer)
+        prefix = insert['prefix']
+        result['prefix'] = prefix
+        if sampler is not None:
+            sampler.phase('insert')
+        # Poll the consumers' FIBs until the prefix has reached all of them, instead of a fixed sleep
+        result['insert'] = propagation.measure_insert(producer_host, consumers, insert,
+                                                      deadline=scenario['ready_deadline'])
+
+        if sampler is not None:
+            sampler.phase('probe')
+        result['probes'] = probe.probe_all(consumers, prefix)
+        for record in result['probes']:
+            rtt = f'{record["rtt_ms"]:.1f} ms' if record['rtt_ms'] is not None else '-'
+            info(f'  {record["host"]}: {record["outcome"]} {rtt}\n')
+
+        if sampler is not None:
+            sampler.phase('withdraw')
+        result['withdraw'] = propagation.measure_withdraw(producer_host, consumers, prefix,
+                                                          deadline=scenario['ready_deadline'])
+        prefix = None
+
+        result['total_s'] = time.time() - start
+        info(f'Scenario completed in: {result["total_s"]:.2f}s\n')
+    except Exception as e:
+        result['error'] = str(e)
+        info(f'Scenario {scenario["name"]} failed: {e}\n')
+    finally:
+        if prefix is not None:
+            try:
+                agent.command(producer_host, {'cmd': 'withdraw', 'prefix': prefix})
+            except Exception as e:
+                info(f'Withdrawal of {prefix} failed: {e}\n')
+
+        if sampler is not None:
+            sampler.stop()
+            result['telemetry'] = os.path.join(telemetry_dir, f'{scenario["name"]}.npz')
+            sampler.save(result['telemetry'])
+
+        # Call all cleanups without stopping the network
+        # This ensures we don't recreate the network for each scenario
+        for cleanup in reversed(ndn.cleanups):
+            cleanup()
+        ndn.cleanups.clear()
+
+    info(f"===================================================\n\n")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Run prefix insertion scenarios on one Mini-NDN network')
+    parser.add_argument('--scenarios', default='scenarios.json',
+                        help='JSON or YAML file with a list of scenarios (default: scenarios.json)')
+    parser.add_argument('--only', action='append', default=None,
+                        help='Only run the named scenario; can be repeated')
+    parser.add_argument('--app-dir', default=agent.DEFAULT_APP_DIR,
+                        help=f'Directory with the agent and producer scripts (default: {agent.DEFAULT_APP_DIR})')
+    parser.add_argument('--results', default=None,
+                        help='Write scenario results to this JSON file')
+    parser.add_argument('--schema', default=SCHEMA_PATH,
+                        help='Compiled prefix insertion schema (.tlv); compile .lvs sources with '
+                             f'util/compile_lvs.py (default: {SCHEMA_PATH})')
+    parser.add_argument('--telemetry', default=None,
+                        help='Sample ndnd CPU, RSS, context switches and I/O into <dir>/<scenario>.npz')
+    parser.add_argument('--telemetry-interval', type=float, default=0.5,
+                        help='Seconds between telemetry samples (default: 0.5)')
+    parser.add_argument('--csv', default=None,
+                        help='Write per-node insertion and withdrawal propagation latencies to this CSV file')
+
+    setLogLevel('info')
+
+    Minindn.cleanUp()
+    Minindn.verifyDependencies()
+
+    ndn = Minindn(parser=parser)
+    args = ndn.args
+
+    scenarios = load_scenarios(args.scenarios)
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario['name'] in args.only]
+
+    if args.telemetry:
+        os.makedirs(args.telemetry, exist_ok=True)
+
+    ndn.start()
+    results = []
+    try:
+        for scenario in scenarios:
+            results.append(run_scenario(ndn, scenario, args.app_dir, args.telemetry, args.telemetry_interval,
+                                        os.path.abspath(args.schema)))
+    finally:
+        # kill everything we started just in case ...
+        os.system('pkill -9 ndnd')
+        os.system('pkill -9 nfd')
+        ndn.stop()
+
+    if args.results:
+        with open(args.results, 'w') as f:
+            json.dump(results, f, indent=4)
+    if args.csv:
+        propagation.write_csv(args.csv, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import topogen
+
+DEFAULT_SIZES = [10, 20, 50, 100, 200, 500]
+
+
+def run(kind: str, n: int, args: argparse.Namespace) -> list[dict]:
+    """
+    Generate one topology and run the selected scenarios on it in a fresh runner process,
+    so every size starts from a clean Mininet. Returns the summary rows for this topology.
+    """
+    topo = os.path.join(args.out_dir, f'topo.{kind}.{n}.conf')
+    results_path = os.path.join(args.out_dir, f'results.{kind}.{n}.json')
+    n_nodes, n_links = topogen.write_topology(topo, kind, n, args.seed, args.delay, args.bw)
+    print(f'=== {kind}: {n_nodes} nodes, {n_links} links', flush=True)
+
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runner.py'),
+           '--scenarios', args.scenarios, '--results', results_path,
+           '--csv', os.path.join(args.out_dir, f'propagation.{kind}.{n}.csv')]
+    for name in args.only:
+        cmd += ['--only', name]
+    cmd.append(topo)
+    subprocess.run(cmd, check=False)
+
+    try:
+        with open(results_path, 'r') as f:
+            results = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return [{'kind': kind, 'nodes': n_nodes, 'links': n_links, 'error': 'runner produced no results'}]
+
+    rows = []
+    for result in results:
+        row = {'kind': kind, 'nodes': n_nodes, 'links': n_links, 'scenario': result['name'],
+               'setup_s': result.get('setup_s'), 'converge_ms': result.get('converge_ms')}
+        for phase in ('insert', 'withdraw'):
+            for key, value in result.get(phase, {}).get('summary', {}).items():
+                row[f'{phase}_{key}_ms'] = value
+        row['error'] = result.get('error')
+        rows.append(row)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Sweep DV convergence and prefix insertion latency over '
+                                                 'synthetic topologies of increasing size (run as root)')
+    parser.add_argument('--kinds', nargs='+', choices=topogen.GENERATORS, default=['grid', 'ba'],
+                        help='Graph models to sweep (default: grid ba)')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help=f'Node counts (default: {" ".join(map(str, DEFAULT_SIZES))})')
+    parser.add_argument('--delay', default='10ms', help='Link delay (default: 10ms)')
+    parser.add_argument('--bw', type=int, default=None, help='Link bandwidth in Mbit/s (default: unlimited)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--scenarios', default='scenarios.json',
+                        help='Scenario file passed to the runner (default: scenarios.json)')
+    parser.add_argument('--only', action='append', default=None,
+                        help='Scenario to run on every topology; can be repeated (default: insert)')
+    parser.add_argument('--out-dir', default='sweep-results',
+                        help='Directory for topologies, per-run results and summary.csv (default: sweep-results)')
+    args = parser.parse_args()
+    args.only = args.only or ['insert']
+    args.scenarios = os.path.abspath(args.scenarios)
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    rows = [row for kind in args.kinds for n in args.sizes for row in run(kind, n, args)]
+
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    summary = os.path.join(args.out_dir, 'summary.csv')
+    with open(summary, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    for row in rows:
+        print(f'{row["kind"]:>8} {row["nodes"]:>4} nodes {row["links"]:>5} links: '
+              f'converge {row.get("converge_ms") or float("nan"):8.0f} ms, '
+              f'insert p90 {row.get("insert_p90_ms") or float("nan"):8.0f} ms, '
+              f'withdraw p90 {row.get("withdraw_p90_ms") or float("nan"):8.0f} ms'
+              + (f'  ({row["error"]})' if row.get('error') else ''))
+    print(f'Summary written to {summary}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+import argparse
+import array
+import ast
+import json
+import sys
+import threading
+import time
+import zipfile
+
+from minindn.apps.app_manager import AppManager
+
+import procstat
+
+# Column name -> array typecode; stored as .npy members of an .npz archive, one row per sample
+COLUMNS = {
+    'time': 'd',                # seconds since the sampler started
+    'process': 'i',             # index into the 'processes' list of the metadata
+    'cpu_s': 'd',
+    'rss': 'q',
+    'voluntary_ctxt': 'q',
+    'nonvoluntary_ctxt': 'q',
+    'read_bytes': 'q',
+    'write_bytes': 'q',
+}
+
+NPY_DTYPES = {'d': '<f8', 'i': '<i4', 'q': '<i8'}
+
+
+class Sampler(threading.Thread):
+    """
+    Background thread that samples every ndnd process of the added apps at a fixed interval.
+
+    Samples are kept in compact typed arrays and saved as an .npz archive that numpy can load
+    directly, with the process list and phase boundaries in a 'meta' JSON member.
+    """
+    def __init__(self, interval: float = 0.5):
+        threading.Thread.__init__(self, daemon=True)
+        self.interval = interval
+        self.columns = {name: array.array(typecode) for name, typecode in COLUMNS.items()}
+        # (role, node name, pid)
+        self.processes: list[tuple[str, str, int]] = []
+        self.phases: list[tuple[str, float]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._t0 = time.time()
+
+    def add(self, role: str, manager: AppManager) -> None:
+        with self._lock:
+            for app in manager.apps:
+                if app.process is not None:
+                    self.processes.append((role, app.node.name, app.process.pid))
+
+    def phase(self, name: str) -> None:
+        """
+        Mark the start of a phase; it lasts until the next phase starts or sampling stops
+        """
+        self.phases.append((name, time.time() - self._t0))
+
+    def run(self) -> None:
+        next_sample = time.time()
+        while not self._stop_event.is_set():
+            self.sample()
+            next_sample += self.interval
+            self._stop_event.wait(max(0.0, next_sample - time.time()))
+
+    def sample(self) -> None:
+        with self._lock:
+            processes = list(enumerate(self.processes))
+        now = time.time() - self._t0
+        for index, (_, _, pid) in processes:
+            try:
+                sample = procstat.read_all(pid)
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+            self.columns['time'].append(now)
+            self.columns['process'].append(index)
+            for name in COLUMNS.keys() - {'time', 'process'}:
+                self.columns[name].append(sample[name])
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        # A last sample, so that a phase shorter than the interval still has a CPU reading
+        self.sample()
+        self.phases.append(('end', time.time() - self._t0))
+
+    def meta(self) -> dict:
+        return {'interval': self.interval, 'start': self._t0,
+                'processes': [list(process) for process in self.processes], 'phases': self.phases}
+
+    def save(self, path: str) -> None:
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, column in self.columns.items():
+                archive.writestr(f'{name}.npy', _to_npy(column))
+            archive.writestr('meta.json', json.dumps(self.meta()))
+
+
+def _to_npy(column: array.array) -> bytes:
+    """
+    Encode a 1-d array in the .npy format (version 1.0)
+    """
+    header = f"{{'descr': '{NPY_DTYPES[column.typecode]}', 'fortran_order': False, 'shape': ({len(column)},), }}"
+    # Magic, version and header length take 10 bytes; the header is padded to a multiple of 64
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+    if sys.byteorder != 'little':
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1') + column.tobytes()
+
+
+def _from_npy(data: bytes) -> array.array:
+    header_len = int.from_bytes(data[8:10], 'little')
+    header = ast.literal_eval(data[10:10 + header_len].decode('latin1'))
+    typecode = {dtype: typecode for typecode, dtype in NPY_DTYPES.items()}[header['descr']]
+    column = array.array(typecode)
+    column.frombytes(data[10 + header_len:])
+    if sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def load(path: str) -> tuple[dict[str, array.array], dict]:
+    """
+    Read an archive written by Sampler.save without needing numpy
+    """
+    with zipfile.ZipFile(path, 'r') as archive:
+        columns = {name: _from_npy(archive.read(f'{name}.npy')) for name in COLUMNS}
+        meta = json.loads(archive.read('meta.json'))
+    return columns, meta
+
+
+def summarize(path: str) -> list[dict]:
+    """
+    Peak and mean CPU utilization and RSS, and context switches, per process and phase.
+    CPU utilization is the CPU time between consecutive samples divided by the wall time.
+    """
+    return summarize_samples(*load(path))
+
+
+def summarize_samples(columns: dict[str, array.array], meta: dict) -> list[dict]:
+    """
+    summarize() for the columns and meta of a Sampler that has not been saved
+    """
+    phases = meta['phases']
+
+    def phase_of(t: float) -> str:
+        current = None
+        for name, start in phases:
+            if start > t:
+                break
+            current = name
+        return current
+
+    # Per (process, phase): cpu utilization samples, rss samples, first/last ctxt totals
+    stats: dict[tuple[int, str], dict] = {}
+    last: dict[int, tuple[float, float]] = {}
+    for i in range(len(columns['time'])):
+        t, process = columns['time'][i], columns['process'][i]
+        phase = phase_of(t)
+        if phase is None or phase == 'end':
+            continue
+        entry = stats.setdefault((process, phase), {'cpu': [], 'rss': [], 'ctxt': []})
+        entry['rss'].append(columns['rss'][i])
+        entry['ctxt'].append(columns['voluntary_ctxt'][i] + columns['nonvoluntary_ctxt'][i])
+        if process in last and t > last[process][0]:
+            entry['cpu'].append((columns['cpu_s'][i] - last[process][1]) / (t - last[process][0]))
+        last[process] = (t, columns['cpu_s'][i])
+
+    rows = []
+    for (process, phase), entry in sorted(stats.items(), key=lambda item: (item[0][0], _phase_index(phases, item[0][1]))):
+        role, node, _ = meta['processes'][process]
+        cpu, rss = entry['cpu'], entry['rss']
+        rows.append({
+            'node': node, 'role': role, 'phase': phase,
+            'cpu_peak': max(cpu, default=0.0), 'cpu_mean': sum(cpu) / len(cpu) if cpu else 0.0,
+            'rss_peak_mb': max(rss) / 2**20, 'rss_mean_mb': sum(rss) / len(rss) / 2**20,
+            'ctxt_switches': entry['ctxt'][-1] - entry['ctxt'][0],
+        })
+    return rows
+
+
+def _phase_index(phases: list, name: str) -> int:
+    return [phase for phase, _ in phases].index(name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Summarize ndnd resource telemetry per node and phase')
+    parser.add_argument('path', help='Telemetry archive (.npz) written by the scenario runner')
+    parser.add_argument('--by', choices=['node', 'phase'], default='phase',
+                        help='Print one row per node and phase, or aggregate all nodes per phase (default: phase)')
+    args = parser.parse_args()
+
+    rows = summarize(args.path)
+    if args.by == 'node':
+        print(f'{"node":>12} {"role":>4} {"phase":>10} {"cpu peak":>9} {"cpu mean":>9} '
+              f'{"rss peak":>9} {"rss mean":>9} {"ctxt sw":>9}')
+        for row in rows:
+            print(f'{row["node"]:>12} {row["role"]:>4} {row["phase"]:>10} {row["cpu_peak"]:9.2f} {row["cpu_mean"]:9.2f} '
+                  f'{row["rss_peak_mb"]:8.1f}M {row["rss_mean_mb"]:8.1f}M {row["ctxt_switches"]:9d}')
+        return
+
+    print(f'{"role":>4} {"phase":>10} {"nodes":>5} {"cpu peak":>9} {"cpu mean":>9} '
+          f'{"rss peak":>9} {"rss mean":>9} {"ctxt sw":>10}')
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for row in rows:
+        groups.setdefault((row['role'], row['phase']), []).append(row)
+    for (role, phase), group in groups.items():
+        print(f'{role:>4} {phase:>10} {len(group):5d} {max(r["cpu_peak"] for r in group):9.2f} '
+              f'{sum(r["cpu_mean"] for r in group) / len(group):9.2f} '
+              f'{max(r["rss_peak_mb"] for r in group):8.1f}M '
+              f'{sum(r["rss_mean_mb"] for r in group) / len(group):8.1f}M '
+              f'{sum(r["ctxt_switches"] for r in group):10d}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import math
+import random
+
+# Generators return node positions (x, y in [0, 1)) and undirected links as index pairs
+
+
+def grid(n: int, rng: random.Random = None) -> tuple[list[tuple[float, float]], list[tuple[int, int]]]:
+    """
+    Rows x columns grid with at least ``n`` nodes, as close to square as possible
+    """
+    cols = math.ceil(math.sqrt(n))
+    rows = math.ceil(n / cols)
+    positions = [((i % cols) / cols, (i // cols) / rows) for i in range(rows * cols)]
+    links = []
+    for i in range(rows * cols):
+        if i % cols < cols - 1:
+            links.append((i, i + 1))
+        if i + cols < rows * cols:
+            links.append((i, i + cols))
+    return positions, links
+
+
+def fat_tree(n: int, rng: random.Random = None) -> tuple[list[tuple[float, float]], list[tuple[int, int]]]:
+    """
+    Switches of the smallest k-ary fat-tree (k even) with at least ``n`` nodes: (k/2)^2 core,
+    then k pods of k/2 aggregation and k/2 edge switches, 5k^2/4 nodes in total.
+    """
+    k = 2
+    while 5 * k * k // 4 < n:
+        k += 2
+    half = k // 2
+    n_core = half * half
+
+    def agg(pod, i):
+        return n_core + pod * k + i
+
+    def edge(pod, i):
+        return n_core + pod * k + half + i
+
+    positions = [(c / n_core, 0.0) for c in range(n_core)]
+    for pod in range(k):
+        positions += [((pod * half + i) / (k * half), 0.5) for i in range(half)]
+        positions += [((pod * half + i) / (k * half), 0.99) for i in range(half)]
+
+    links = []
+    for pod in range(k):
+        for i in range(half):
+            # Aggregation switch i of every pod connects to core switches i*k/2 .. (i+1)*k/2 - 1
+            links += [(half * i + j, agg(pod, i)) for j in range(half)]
+            links += [(agg(pod, i), edge(pod, j)) for j in range(half)]
+    return positions, links
+
+
+def barabasi_albert(n: int, rng: random.Random, m: int = 2) -> tuple[list[tuple[float, float]], list[tuple[int, int]]]:
+    """
+    Preferential attachment: each new node links to ``m`` existing nodes chosen by degree
+    """
+    positions = [(rng.random(), rng.random()) for _ in range(n)]
+    links = [(i, j) for i in range(min(m + 1, n)) for j in range(i + 1, min(m + 1, n))]
+    # Every node appears once per incident link, so sampling from it is sampling by degree
+    targets = [node for link in links for node in link]
+    for new in range(m + 1, n):
+        chosen = set()
+        while len(chosen) < m:
+            chosen.add(rng.choice(targets))
+        for node in chosen:
+            links.append((node, new))
+            targets += [node, new]
+    return positions, links
+
+
+def waxman(n: int, rng: random.Random, alpha: float = 0.4, beta: float = 0.1) -> tuple[list[tuple[float, float]], list[tuple[int, int]]]:
+    """
+    Waxman random geometric graph: nodes u, v at distance d are linked with probability
+    alpha * exp(-d / (beta * L)), L being the largest distance. Components are then joined
+    through their closest node pairs so that the graph is connected.
+    """
+    positions = [(rng.random(), rng.random()) for _ in range(n)]
+    max_dist = math.sqrt(2)
+    links = [(u, v) for u in range(n) for v in range(u + 1, n)
+             if rng.random() < alpha * math.exp(-math.dist(positions[u], positions[v]) / (beta * max_dist))]
+
+    parent = list(range(n))
+
+    def find(u):
+        while parent[u] != u:
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return u
+
+    for u, v in links:
+        parent[find(u)] = find(v)
+    components: dict[int, list[int]] = {}
+    for u in range(n):
+        components.setdefault(find(u), []).append(u)
+
+    joined, *others = sorted(components.values(), key=len, reverse=True) if components else [[]]
+    for component in others:
+        u, v = min(((u, v) for u in component for v in joined),
+                   key=lambda pair: math.dist(positions[pair[0]], positions[pair[1]]))
+        links.append((u, v))
+        joined += component
+    return positions, links
+
+
+GENERATORS = {
+    'grid': grid,
+    'fat-tree': fat_tree,
+    'ba': barabasi_albert,
+    'waxman': waxman,
+}
+
+
+def generate(kind: str, n: int, seed: int = 0) -> tuple[list[tuple[float, float]], list[tuple[int, int]]]:
+    return GENERATORS[kind](n, random.Random(seed))
+
+
+def to_conf(positions: list[tuple[float, float]], links: list[tuple[int, int]], delay: str = '10ms',
+            bw: int = None, scale: float = 100) -> str:
+    """
+    Mini-NDN topology file for the graph. Nodes are named n0, n1, ... so that
+    interface names stay within the kernel's length limit.
+    """
+    lines = ['[nodes]']
+    lines += [f'n{i}: _ position={x * scale:.1f},{y * scale:.1f},0' for i, (x, y) in enumerate(positions)]
+    lines.append('[links]')
+    params = f'delay={delay}' + (f' bw={bw}' if bw else '')
+    lines += [f'n{u}:n{v} {params}' for u, v in links]
+    return '\n'.join(lines) + '\n'
+
+
+def write_topology(path: str, kind: str, n: int, seed: int = 0, delay: str = '10ms', bw: int = None) -> tuple[int, int]:
+    """
+    Generate a topology and write it to ``path``. Returns the number of nodes and links.
+    """
+    positions, links = generate(kind, n, seed)
+    with open(path, 'w') as f:
+        f.write(to_conf(positions, links, delay, bw))
+    return len(positions), len(links)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate synthetic Mini-NDN topologies')
+    parser.add_argument('kind', choices=GENERATORS, help='Graph model')
+    parser.add_argument('--nodes', type=int, default=50,
+                        help='Number of nodes; grid and fat-tree round up to the next complete graph (default: 50)')
+    parser.add_argument('--delay', default='10ms', help='Link delay (default: 10ms)')
+    parser.add_argument('--bw', type=int, default=None, help='Link bandwidth in Mbit/s (default: unlimited)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output file (default: topo.<kind>.<nodes>.conf)')
+    args = parser.parse_args()
+
+    output = args.output or f'topo.{args.kind}.{args.nodes}.conf'
+    n_nodes, n_links = write_topology(output, args.kind, args.nodes, args.seed, args.delay, args.bw)
+    print(f'Wrote {output}: {n_nodes} nodes, {n_links} links')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+import asyncio
+import argparse
+import json
+import os
+import signal
+import time
+from ndn import appv2, types
+from ndn.appv2 import NDNApp
+from ndn.security import NullSigner
+from ndn.encoding import Name
+import main as producer
+from app_pool import AppPool
+from prefix_insertion_client import InsertionResult, StapledCertBundle, insert_prefix, insert_prefixes
+from insertion_metrics import MetricsRegistry
+from cert_util import get_signer_from_ndnd_key, read_ndnd_cert
+from content_store import ContentStore
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Agent:
+    """
+    Long-lived producer and consumer for one host, driven over a local control socket.
+
+    Each request is one JSON object per line with a ``cmd`` field. The agent answers with one
+    or more JSON lines; the last one has ``"done": true``. Supported commands:
+
+    - ``ping``
+    - ``insert``: insert ``prefix`` and serve Data under it
+      (optional ``cost``, ``expiration``, ``key_path``, ``cert_path``, ``staple``,
+      ``also_register``, ``freshness``)
+    - ``withdraw``: withdraw ``prefix`` and stop serving it
+    - ``insert_batch``, ``withdraw_batch``: the same for a list of ``prefixes``
+    - ``express``: express ``count`` Interests for ``name`` (or ``template`` formatted with ``i``),
+      at most ``window`` at a time, streaming one record per Interest
+
+    Prefixes are spread over the faces of an AppPool; each is inserted through the face
+    that serves it, and Interests are expressed round-robin over all faces.
+    """
+    def __init__(self, pool: AppPool, key_path: str, cert_path: str):
+        self.pool = pool
+        self.key_path = key_path
+        self.cert_path = cert_path
+        # prefix -> insert request, for withdrawal
+        self.served: dict[str, dict] = {}
+        self.content_store = ContentStore()
+        self.metrics = MetricsRegistry()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                    handler = getattr(self, f'cmd_{request.get("cmd")}', None)
+                    if handler is None:
+                        raise ValueError(f'Unknown command {request.get("cmd")!r}')
+                    async for reply in handler(request):
+                        writer.write(json.dumps(reply).encode() + b'\n')
+                        await writer.drain()
+                except Exception as e:
+                    writer.write(json.dumps({'error': f'{e.__class__.__name__}: {e}', 'done': True}).encode() + b'\n')
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def cmd_ping(self, request: dict):
+        yield {'ok': True, 'done': True}
+
+    async def cmd_metrics(self, request: dict):
+        """
+        Insertion metrics of this agent, as JSON or (``format: prometheus``) Prometheus text
+        """
+        if request.get('format') == 'prometheus':
+            yield {'metrics': self.metrics.to_prometheus(), 'done': True}
+        else:
+            yield {'metrics': self.metrics.to_dict(), 'done': True}
+
+    async def cmd_insert(self, request: dict):
+        prefix = request['prefix']
+        signer, certs = self._credentials(request)
+        self._serve(prefix, request)
+
+        start = time.perf_counter()
+        app = self.pool.app_for(prefix)
+        result = await insert_prefix(app, prefix, NullSigner(), signer, request.get('expiration', 24 * 3600_000),
+                                     request.get('cost', 5), certs, metrics=self.metrics)
+        reply = {**result.to_dict(), 'prefix': prefix, 'elapsed_ms': (time.perf_counter() - start) * 1000,
+                 'done': True}
+        if request.get('also_register', False):
+            reply['register'] = await app.register(prefix)
+        yield reply
+
+    async def cmd_withdraw(self, request: dict):
+        prefix = request['prefix']
+        insert = self.served.pop(prefix, None)
+        if insert is None:
+            raise ValueError(f'{prefix} is not served by this agent')
+        signer, certs = self._credentials(insert)
+
+        start = time.perf_counter()
+        app = self.pool.app_for(prefix)
+        result = await insert_prefix(app, prefix, NullSigner(), signer, 0, insert.get('cost', 5), certs,
+                                     metrics=self.metrics)
+        reply = {**result.to_dict(), 'prefix': prefix, 'elapsed_ms': (time.perf_counter() - start) * 1000,
+                 'done': True}
+        if insert.get('also_register', False):
+            reply['unregister'] = await app.unregister(prefix)
+        self.pool.detach_handler(prefix)
+        yield reply
+
+    async def cmd_insert_batch(self, request: dict):
+        """
+        Insert all ``prefixes`` with at most ``window`` insertions in flight, like insert
+        """
+        prefixes = request['prefixes']
+        signer, certs = self._credentials(request)
+        for prefix in prefixes:
+            self._serve(prefix, request)
+
+        start = time.perf_counter()
+        expiration = request.get('expiration', 24 * 3600_000)
+        results = await self._insert_batch([(prefix, request.get('cost', 5), expiration) for prefix in prefixes],
+                                           signer, certs, request.get('window', 64))
+        yield {'ok': sum(result.ok for result in results),
+               'failed': [prefix for prefix, result in zip(prefixes, results) if not result.ok],
+               'elapsed_ms': (time.perf_counter() - start) * 1000, 'done': True}
+
+    async def cmd_withdraw_batch(self, request: dict):
+        """
+        Withdraw all ``prefixes``, or every prefix this agent serves if none are given
+        """
+        prefixes = request.get('prefixes', list(self.served))
+        inserts = [(prefix, self.served.pop(prefix)) for prefix in prefixes if prefix in self.served]
+
+        start = time.perf_counter()
+        # One batch per set of credentials
+        groups: dict[tuple, list[tuple[str, dict]]] = {}
+        for prefix, insert in inserts:
+            key = (insert.get('key_path'), insert.get('cert_path'), insert.get('staple', True))
+            groups.setdefault(key, []).append((prefix, insert))
+
+        results = []
+        for group in groups.values():
+            signer, certs = self._credentials(group[0][1])
+            group_results = await self._insert_batch([(prefix, insert.get('cost', 5), 0) for prefix, insert in group],
+                                                     signer, certs, request.get('window', 64))
+            results += zip((prefix for prefix, _ in group), (result.ok for result in group_results))
+        for prefix, _ in inserts:
+            self.pool.detach_handler(prefix)
+        yield {'ok': sum(ok for _, ok in results), 'failed': [prefix for prefix, ok in results if not ok],
+               'elapsed_ms': (time.perf_counter() - start) * 1000, 'done': True}
+
+    async def cmd_express(self, request: dict):
+        count = request.get('count', 1)
+        template = request.get('template', request.get('name'))
+        lifetime = request.get('lifetime', 6000)
+        in_flight = asyncio.Semaphore(request.get('window', count))
+        records: asyncio.Queue = asyncio.Queue()
+
+        async def fetch(name: str):
+            async with in_flight:
+                records.put_nowait(await express(self.pool.consumer(), name, lifetime))
+
+        tasks = [asyncio.create_task(fetch(template.format(i=i))) for i in range(count)]
+        outcomes = {}
+        for _ in tasks:
+            record = await records.get()
+            outcomes[record['outcome']] = outcomes.get(record['outcome'], 0) + 1
+            yield record
+        yield {'outcomes': outcomes, 'done': True}
+
+    def _credentials(self, request: dict) -> tuple:
+        key_path = request.get('key_path', self.key_path)
+        cert_path = request.get('cert_path', self.cert_path)
+        signer = get_signer_from_ndnd_key(key_path, cert_path)
+        certs = StapledCertBundle([read_ndnd_cert(cert_path)['cert_data']]) if request.get('staple', True) else None
+        return signer, certs
+
+    async def _insert_batch(self, prefixes: list[tuple[str, int, int]], signer, certs,
+                            window: int) -> list[InsertionResult]:
+        """
+        insert_prefixes on every face serving some of ``prefixes`` at once, results in input order
+        """
+        groups = self.pool.group([prefix for prefix, _, _ in prefixes])
+        group_results = await asyncio.gather(*(
+            insert_prefixes(app, [prefixes[i] for i in indexes], NullSigner(), signer, certs, window=window,
+                            metrics=self.metrics)
+            for app, indexes in groups.items()))
+        results = [None] * len(prefixes)
+        for indexes, batch in zip(groups.values(), group_results):
+            for i, result in zip(indexes, batch):
+                results[i] = result
+        return results
+
+    def _serve(self, prefix: str, request: dict) -> None:
+        if prefix not in self.served:
+            self.pool.attach_handler(prefix, producer.on_interest_handler_factory(
+                prefix, freshness=request.get('freshness', 0), content_store=self.content_store))
+        self.served[prefix] = request
+
+
+async def express(app: NDNApp, name: str, lifetime: int) -> dict:
+    """
+    Express one Interest and return its outcome and RTT in milliseconds
+    """
+    record = {'name': name, 'outcome': None, 'rtt_ms': None}
+    start = time.perf_counter()
+    try:
+        await app.express(name, validator=appv2.pass_all,
+                          must_be_fresh=True, can_be_prefix=False, lifetime=lifetime)
+        record['rtt_ms'] = (time.perf_counter() - start) * 1000
+        record['outcome'] = 'data'
+    except types.InterestNack as e:
+        record['outcome'] = 'nack'
+        record['reason'] = e.reason
+    except types.InterestTimeout:
+        record['outcome'] = 'timeout'
+    except types.InterestCanceled:
+        record['outcome'] = 'canceled'
+    except types.ValidationFailure:
+        record['outcome'] = 'invalid'
+    except Exception as e:
+        # A malformed name or a face that went down; cmd_express waits for one record per Interest
+        record['outcome'] = 'error'
+        record['reason'] = f'{e.__class__.__name__}: {e}'
+    return record
+
+
+async def serve(pool: AppPool, socket_path: str, key_path: str, cert_path: str) -> None:
+    agent = Agent(pool, key_path, cert_path)
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = await asyncio.start_unix_server(agent.handle_client, path=socket_path)
+    print(f'Agent listening on {socket_path}', flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Persistent producer/consumer agent controlled over a Unix socket')
+    parser.add_argument('--port', type=int, default=6363,
+                        help='UDP port number of the local forwarder (default: 6363)')
+    parser.add_argument('--socket', type=str, default='agent.sock',
+                        help='Path of the control socket (default: agent.sock)')
+    parser.add_argument('--key-path', type=str, default=os.path.join(APP_DIR, 'personal-keys/bar.key'),
+                        help='Default NDN key file for insertions (default: personal-keys/bar.key)')
+    parser.add_argument('--cert-path', type=str, default=os.path.join(APP_DIR, 'personal-keys/bar.cert'),
+                        help='Default NDN certificate file for insertions (default: personal-keys/bar.cert)')
+    parser.add_argument('--faces', type=int, default=1,
+                        help='Number of faces to the forwarder that served prefixes and Interests are '
+                             'spread over (default: 1)')
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, producer.handle_signal)
+    signal.signal(signal.SIGTERM, producer.handle_signal)
+
+    pool = AppPool(args.faces, args.port)
+    # The producer's Interest handlers build Data through its module-level app; encoding
+    # does not depend on the face, so any app of the pool will do
+    producer.app = pool.apps[0]
+    pool.run_forever(serve(pool, args.socket, args.key_path, args.cert_path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+from ndn.appv2 import NDNApp, IntHandler, Validator
+from ndn.encoding import Name, NonStrictName
+from ndn.transport.face import Face
+from ndn.transport.udp_face import UdpFace
+
+
+class AppPool:
+    """
+    A few long-lived NDNApps, each on its own face to the local forwarder, shared by many
+    logical producers and consumers in one process.
+
+    A producer's prefix is placed on the app currently serving the fewest prefixes and stays
+    there; that app's handler tree then dispatches Interests by prefix. Insertions and
+    registrations for a prefix must go through ``app_for(prefix)``, since the forwarder routes
+    the prefix to the face the command arrived on. Consumers are spread round-robin.
+    """
+
+    def __init__(self, size: int = 1, port: int = 6363, face_factory: Optional[Callable[[], Face]] = None):
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        face_factory = face_factory or (lambda: UdpFace(port=port))
+        self.apps = [NDNApp(face_factory()) for _ in range(size)]
+        # prefix -> index of the app serving it
+        self._placement: dict[bytes, int] = {}
+        self._load = [0] * size
+        self._next_consumer = 0
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Open every face. Raises if one cannot connect.
+        """
+        loop = asyncio.get_running_loop()
+        for app in self.apps:
+            ready = loop.create_future()
+            task = asyncio.create_task(app.main_loop(after_start=self._set_ready(ready)))
+            self._tasks.append(task)
+            await asyncio.wait({ready, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not ready.done():
+                await self.stop()
+                raise task.exception() or ConnectionError('Face closed while starting')
+
+    @staticmethod
+    async def _set_ready(ready: asyncio.Future) -> None:
+        ready.set_result(None)
+
+    async def stop(self) -> None:
+        for app in self.apps:
+            app.shutdown()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def main_loop(self, after_start: Awaitable):
+        """
+        Start the pool, run ``after_start`` and stop the pool when it returns
+        """
+        await self.start()
+        try:
+            return await after_start
+        finally:
+            await self.stop()
+
+    def run_forever(self, after_start: Awaitable) -> None:
+        try:
+            asyncio.run(self.main_loop(after_start))
+        except KeyboardInterrupt:
+            pass
+
+    def attach_handler(self, name: NonStrictName, handler: IntHandler,
+                       validator: Optional[Validator] = None) -> NDNApp:
+        """
+        Serve ``name`` with ``handler`` on the least loaded app and return that app
+        """
+        key = Name.to_bytes(Name.normalize(name))
+        if key in self._placement:
+            raise ValueError(f'Duplicated handler attachment: {Name.to_str(name)}')
+        index = min(range(len(self.apps)), key=self._load.__getitem__)
+        self.apps[index].attach_handler(name, handler, validator)
+        self._placement[key] = index
+        self._load[index] += 1
+        return self.apps[index]
+
+    def detach_handler(self, name: NonStrictName) -> None:
+        index = self._placement.pop(Name.to_bytes(Name.normalize(name)))
+        self.apps[index].detach_handler(name)
+        self._load[index] -= 1
+
+    def app_for(self, name: NonStrictName) -> NDNApp:
+        """
+        The app serving the prefix ``name``. Raises KeyError if no handler is attached for it.
+        """
+        return self.apps[self._placement[Name.to_bytes(Name.normalize(name))]]
+
+    def group(self, names: list[NonStrictName]) -> dict[NDNApp, list[int]]:
+        """
+        Indexes of ``names`` per app serving them, for batch insertions
+        """
+        groups: dict[NDNApp, list[int]] = {}
+        for i, name in enumerate(names):
+            groups.setdefault(self.app_for(name), []).append(i)
+        return groups
+
+    def consumer(self) -> NDNApp:
+        """
+        The next app in round-robin order, for expressing Interests
+        """
+        app = self.apps[self._next_consumer]
+        self._next_consumer = (self._next_consumer + 1) % len(self.apps)
+        return app
+
+    async def express(self, name: NonStrictName, *args, **kwargs):
+        return await self.consumer().express(name, *args, **kwargs)
+
+    def __len__(self) -> int:
+        return len(self._placement)
@@ -0,0 +1,41 @@
+import argparse
+import os
+import tempfile
+import time
+from cert_util import load_ndnd_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark loading a trust bundle of concatenated NDN certs')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Number of certs in the generated bundle (default: 10000)')
+    parser.add_argument('--cert-path', type=str, default='./personal-keys/bar.cert',
+                        help='Cert repeated to build the bundle (default: ./personal-keys/bar.cert)')
+    args = parser.parse_args()
+
+    with open(args.cert_path, 'r') as file:
+        cert_str = file.read().strip() + '\n'
+
+    with tempfile.NamedTemporaryFile('w', suffix='.cert', delete=False) as bundle:
+        for _ in range(args.count):
+            bundle.write(cert_str)
+    try:
+        start = time.perf_counter()
+        n_blocks = sum(1 for _ in load_ndnd_file(bundle.name))
+        scan = time.perf_counter() - start
+
+        start = time.perf_counter()
+        n_bytes = 0
+        for block in load_ndnd_file(bundle.name):
+            block.name, block.signer_key
+            n_bytes += len(block.der)
+        full = time.perf_counter() - start
+    finally:
+        os.unlink(bundle.name)
+
+    print(f'Scanned {n_blocks} certs in {scan * 1000:.1f}ms ({n_blocks / scan:.0f} certs/s)')
+    print(f'Parsed names and decoded {n_bytes} DER bytes in {full * 1000:.1f}ms ({n_blocks / full:.0f} certs/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import time
+from ndn.security import NullSigner
+from cert_util import get_signer_from_ndnd_key, read_ndnd_cert
+from insert_responder import InsertResponder, run_with_responder
+from insertion_metrics import MetricsRegistry
+from lvs_validator import InsertionValidator
+from prefix_insertion_client import (InsertionSigningPool, StapledCertBundle, create_insertion_object,
+                                     insert_prefix, insert_prefixes)
+
+
+async def bench_batch(app, args, ins_signer, stapled_certs) -> None:
+    prefixes = [(f'{args.prefix}/{i}', 5, 24 * 3600_000) for i in range(args.count)]
+
+    signing_pool = InsertionSigningPool(ins_signer, args.workers) if args.workers > 0 else None
+
+    start = time.perf_counter()
+    results = await insert_prefixes(app, prefixes, NullSigner(), ins_signer,
+                                    stapled_certs=stapled_certs, window=args.window,
+                                    signing_pool=signing_pool, retries=args.retries, metrics=args.metrics)
+    elapsed = time.perf_counter() - start
+
+    if signing_pool is not None:
+        signing_pool.shutdown()
+
+    print(f'Inserted {sum(result.ok for result in results)}/{len(results)} prefixes in {elapsed:.3f}s '
+          f'(window={args.window}, workers={args.workers}): {len(results) / elapsed:.1f} insertions/s')
+
+
+async def bench_latency(app, args, ins_signer, stapled_certs) -> None:
+    latencies = []
+    for i in range(args.count):
+        start = time.perf_counter()
+        await insert_prefix(app, f'{args.prefix}/{i}', NullSigner(), ins_signer,
+                            cost=5, stapled_certs=stapled_certs, retries=args.retries, metrics=args.metrics)
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    mean = sum(latencies) / len(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f'Single insert latency over {len(latencies)} calls (rtt={args.rtt}ms): '
+          f'mean={mean * 1000:.2f}ms p50={p50 * 1000:.2f}ms p99={p99 * 1000:.2f}ms')
+
+
+async def bench_create(app, args, ins_signer, stapled_certs) -> None:
+    names = [f'{args.prefix}/{i}' for i in range(args.count)]
+    start = time.perf_counter()
+    for version, name in enumerate(names):
+        create_insertion_object(name, ins_signer, cost=5, version=version)
+    elapsed = time.perf_counter() - start
+    print(f'Created {len(names)} insertion objects in {elapsed:.3f}s: {len(names) / elapsed:.1f} objects/s')
+
+
+BENCHMARKS = {
+    'batch': bench_batch,
+    'latency': bench_latency,
+    'create': bench_create,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark prefix insertion against a stand-in responder')
+    parser.add_argument('--mode', choices=BENCHMARKS.keys(), default='batch',
+                        help='batch: insert_prefixes throughput, latency: sequential insert_prefix latency, '
+                             'create: create_insertion_object throughput without sending (default: batch)')
+    parser.add_argument('--count', type=int, default=1000,
+                        help='Number of prefixes to insert (default: 1000)')
+    parser.add_argument('--window', type=int, default=64,
+                        help='Number of insertion Interests in flight (default: 64)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Sign insertion objects in a process pool of this size, 0 to sign inline '
+                             '(default: 0)')
+    parser.add_argument('--rtt', type=float, default=10.0,
+                        help='Simulated responder round-trip time in milliseconds (default: 10)')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Extra responder delay, uniform up to this many milliseconds (default: 0)')
+    parser.add_argument('--loss', type=float, default=0.0,
+                        help='Fraction of insertions the responder drops (default: 0)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of insertions the responder answers with a 500 error (default: 0)')
+    parser.add_argument('--verify', action='store_true',
+                        help='Have the responder verify insertion object signatures, trusting the signing '
+                             'certificate itself')
+    parser.add_argument('--schema', type=str, default=None,
+                        help='Have the responder check insertion objects against this compiled LVS schema')
+    parser.add_argument('--retries', type=int, default=0,
+                        help='Re-send insertions that time out or are Nacked up to this many times (default: 0)')
+    parser.add_argument('--metrics-format', choices=['prometheus', 'json'], default=None,
+                        help='Print the collected insertion metrics in this format at the end')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the responder loss and error injection (default: 0)')
+    parser.add_argument('--prefix', type=str, default='/foo/bar',
+                        help='Base name of the inserted prefixes (default: /foo/bar)')
+    parser.add_argument('--key-path', type=str, default='./personal-keys/bar.key',
+                        help='Path to the NDN key file (default: ./personal-keys/bar.key)')
+    parser.add_argument('--cert-path', type=str, default='./personal-keys/bar.cert',
+                        help='Path to the NDN certificate file (default: ./personal-keys/bar.cert)')
+    args = parser.parse_args()
+    args.metrics = MetricsRegistry()
+
+    ins_signer = get_signer_from_ndnd_key(args.key_path, args.cert_path)
+    cert = read_ndnd_cert(args.cert_path)['cert_data']
+    stapled_certs = StapledCertBundle([cert])
+    if not stapled_certs.is_valid():
+        print(f'Warning: {args.cert_path} is not valid now, benchmarking without stapled certificates')
+        stapled_certs = None
+
+    validator = InsertionValidator.from_file(args.schema) if args.schema else None
+
+    def responder(app) -> InsertResponder:
+        return InsertResponder(app, delay=args.rtt / 1000, jitter=args.jitter / 1000, loss=args.loss,
+                               error_rate=args.error_rate, trust_anchors=[cert] if args.verify else None,
+                               validator=validator, seed=args.seed)
+
+    _, stand_in = asyncio.run(run_with_responder(
+        lambda app: BENCHMARKS[args.mode](app, args, ins_signer, stapled_certs), responder))
+    if stand_in.n_received:
+        statuses = ', '.join(f'{code}: {n}' for code, n in sorted(stand_in.statuses.items()))
+        print(f'Responder received {stand_in.n_received}, dropped {stand_in.n_dropped}, replied {statuses}')
+    if args.metrics_format == 'prometheus':
+        print(args.metrics.to_prometheus(), end='')
+    elif args.metrics_format == 'json':
+        print(args.metrics.to_json())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import random
+import time
+from ndn.app_support.light_versec import Checker, DEFAULT_USER_FNS, LvsModel
+from ndn.encoding import Component, Name
+from lvs_validator import InsertionValidator
+
+DEFAULT_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'simulator', 'insert.tlv')
+
+
+def make_names(count: int, nodes: int, seed: int) -> list[tuple[list, list, bool]]:
+    """
+    Insertion object names under /minindn/<node>/... with 0-3 filler components and the
+    client certificate of either the same node (valid) or another node (invalid)
+    """
+    rng = random.Random(seed)
+    insert = Component.from_str('32=PA')
+    certs = [Name.from_str(f'/minindn/n{k}/insert/client/KEY/%01%02/NA/v=1') for k in range(nodes)]
+    names = []
+    for i in range(count):
+        node = rng.randrange(nodes)
+        filler = [f'p{i}', 'a', 'b'][:rng.randrange(4)]
+        name = Name.from_str('/'.join(['', 'minindn', f'n{node}'] + filler)) + [insert]
+        valid = rng.random() < 0.5
+        signer = certs[node] if valid else certs[(node + 1) % nodes]
+        names.append((name, signer, valid))
+    return names
+
+
+def run(check, names: list) -> float:
+    start = time.perf_counter()
+    for name, signer, valid in names:
+        assert check(name, signer) == valid, Name.to_str(name)
+    return len(names) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark local LVS checks of insertion object names')
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA,
+                        help='Compiled insert.lvs of the simulator (default: ../simulator/insert.tlv)')
+    parser.add_argument('--count', type=int, default=1_000_000,
+                        help='Names checked with the compiled validator (default: 1000000)')
+    parser.add_argument('--reference-count', type=int, default=100_000,
+                        help="Names checked with python-ndn's LVS Checker for comparison, 0 to skip (default: 100000)")
+    parser.add_argument('--nodes', type=int, default=50,
+                        help='Number of distinct node names (default: 50)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.schema, 'rb') as f:
+        model = LvsModel.parse(f.read())
+
+    start = time.perf_counter()
+    validator = InsertionValidator(model)
+    print(f'Compiled schema in {(time.perf_counter() - start) * 1e6:.0f} us')
+
+    names = make_names(args.count, args.nodes, args.seed)
+    rate = run(validator.check, names)
+    print(f'InsertionValidator: {rate:.0f} names/s ({1e6 / rate:.2f} us/name) over {len(names)} names')
+
+    if args.reference_count:
+        checker = Checker(model, DEFAULT_USER_FNS)
+        ref_rate = run(checker.check, names[:args.reference_count])
+        print(f'LVS Checker:        {ref_rate:.0f} names/s ({1e6 / ref_rate:.2f} us/name) '
+              f'over {min(len(names), args.reference_count)} names, {rate / ref_rate:.1f}x slower')
+
+
+if __name__ == '__main__':
+    main()
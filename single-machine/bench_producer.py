@@ -0,0 +1,47 @@
+import argparse
+import time
+from ndn.appv2 import NDNApp
+from ndn.encoding import InterestParam, Name
+import main as producer
+from content_store import ContentStore
+from insert_responder import LoopbackFace
+
+
+def run(handler, names, must_be_fresh: bool) -> float:
+    replies = []
+    context = {'int_param': InterestParam(must_be_fresh=must_be_fresh)}
+    start = time.perf_counter()
+    for name in names:
+        handler(name, None, replies.append, context)
+    elapsed = time.perf_counter() - start
+    assert len(replies) == len(names)
+    return len(names) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the producer's Interest handler with and without cache hits")
+    parser.add_argument('--count', type=int, default=100000,
+                        help='Number of Interests per run (default: 100000)')
+    parser.add_argument('--prefix', type=str, default='/foo/bar/baz',
+                        help='Producer prefix (default: /foo/bar/baz)')
+    parser.add_argument('--freshness', type=int, default=10000,
+                        help='FreshnessPeriod of produced Data in milliseconds (default: 10000)')
+    args = parser.parse_args()
+
+    # The handler only needs the app to exist; make_data does not touch the face
+    producer.app = NDNApp(LoopbackFace())
+
+    repeated = [Name.from_str(f'{args.prefix}/item')] * args.count
+    unique = [Name.from_str(f'{args.prefix}/{i}') for i in range(args.count)]
+
+    uncached = producer.on_interest_handler_factory(args.prefix, freshness=args.freshness)
+    cached = producer.on_interest_handler_factory(args.prefix, freshness=args.freshness,
+                                                  content_store=ContentStore(max_entries=args.count))
+
+    print(f'No cache:   {run(uncached, repeated, True):.0f} Interests/s')
+    print(f'Cache miss: {run(cached, unique, True):.0f} Interests/s')
+    print(f'Cache hit:  {run(cached, repeated, True):.0f} Interests/s')
+
+
+if __name__ == '__main__':
+    main()
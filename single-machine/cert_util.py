@@ -1,23 +1,50 @@
-from ndn.encoding import Name, parse_data
+from ndn.encoding import FormalName, Name, NonStrictName, parse_data
 from ndn.security import Sha256WithEcdsaSigner, TpmFile, KeychainSqlite3
-from typing import Optional
+from typing import Callable, Iterable, Iterator, Optional
 import base64
+import binascii
+import os
 
 
-def get_signer_from_ndnd_key(key_path: str, cert_path: Optional[str]=None) -> Sha256WithEcdsaSigner:
-    with open(key_path, "r") as file:
-        ndnd_key_content = file.read()
+# path -> (mtime_ns, size, parsed file)
+_file_cache: dict[str, tuple[int, int, dict]] = {}
+# (key_path, cert_path) -> (key file, cert file, signer)
+_signer_cache: dict[tuple[str, Optional[str]], tuple[dict, Optional[dict], Sha256WithEcdsaSigner]] = {}
+
+
+def _read_cached(path: str, parse: Callable[[str], dict]) -> dict:
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _file_cache.get(path)
+    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    with open(path, "r") as file:
+        parsed = parse(file.read())
+    _file_cache[path] = (stat.st_mtime_ns, stat.st_size, parsed)
+    return parsed
+
+
+def read_ndnd_key(key_path: str) -> dict:
+    """
+    Parse an NDN KEY file, reusing the previous result while the file is unchanged
+    """
+    return _read_cached(key_path, parse_ndnd_key)
+
 
-    key_data = parse_ndnd_key(ndnd_key_content)
+def read_ndnd_cert(cert_path: str) -> dict:
+    """
+    Parse an NDN CERT file, reusing the previous result while the file is unchanged
+    """
+    return _read_cached(cert_path, parse_ndnd_cert)
+
+
+def _make_signer(key_data: dict, cert_data: Optional[dict]) -> Sha256WithEcdsaSigner:
     assert key_data['sig_type'] == "Sha256WithEcdsa", "Unsupported signature type"
 
     _, _, der_content, _ = parse_data(key_data['key_data'])
 
-    if cert_path is not None:
-        with open(cert_path, "r") as file:
-            ndnd_cert_content = file.read()
-
-        cert_data = parse_ndnd_cert(ndnd_cert_content)
+    if cert_data is not None:
         assert key_data['name'] == cert_data['name'][:-2], "Cert does not match key"
 
         key_locator_name = cert_data['name']
@@ -27,41 +54,234 @@ def get_signer_from_ndnd_key(key_path: str, cert_path: Optional[str]=None) -> Sh
     return Sha256WithEcdsaSigner(key_locator_name, der_content)
 
 
+def get_signer_from_ndnd_key(key_path: str, cert_path: Optional[str]=None) -> Sha256WithEcdsaSigner:
+    key_data = read_ndnd_key(key_path)
+    cert_data = read_ndnd_cert(cert_path) if cert_path is not None else None
+
+    cache_key = (os.path.abspath(key_path), os.path.abspath(cert_path) if cert_path is not None else None)
+    cached = _signer_cache.get(cache_key)
+    if cached is not None and cached[0] is key_data and cached[1] is cert_data:
+        return cached[2]
+
+    signer = _make_signer(key_data, cert_data)
+    _signer_cache[cache_key] = (key_data, cert_data, signer)
+    return signer
+
+
+class KeyStore:
+    """
+    Index of the NDN KEY and CERT files in a directory (e.g. client-keys/ or personal-keys/)
+
+    Keys and certs are indexed by name. Files are re-parsed only when their mtime changes,
+    and signers are cached until their key or cert file changes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.keys: dict[bytes, dict] = {}
+        self.certs: dict[bytes, dict] = {}
+        self._key_paths: dict[bytes, str] = {}
+        self._cert_paths: dict[bytes, str] = {}
+        self._signers: dict[tuple[bytes, Optional[bytes]], tuple[dict, Optional[dict], Sha256WithEcdsaSigner]] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Rescan the directory, parsing new or modified files and dropping removed ones
+        """
+        keys, certs, key_paths, cert_paths = {}, {}, {}, {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if entry.name.endswith('.key'):
+                    key_data = read_ndnd_key(entry.path)
+                    name = Name.to_bytes(key_data['name'])
+                    keys[name] = key_data
+                    key_paths[name] = entry.path
+                elif entry.name.endswith('.cert'):
+                    cert_data = read_ndnd_cert(entry.path)
+                    name = Name.to_bytes(cert_data['name'])
+                    certs[name] = cert_data
+                    cert_paths[name] = entry.path
+        self.keys, self.certs = keys, certs
+        self._key_paths, self._cert_paths = key_paths, cert_paths
+
+    def get_key(self, key_name: NonStrictName) -> dict:
+        return self._current(self.keys, self._key_paths, key_name, read_ndnd_key)
+
+    def get_cert(self, cert_name: NonStrictName) -> dict:
+        return self._current(self.certs, self._cert_paths, cert_name, read_ndnd_cert)
+
+    def certs_of_key(self, key_name: NonStrictName) -> list[dict]:
+        key_name = Name.normalize(key_name)
+        return [cert for cert in self.certs.values() if cert['name'][:-2] == key_name]
+
+    def get_signer(self, key_name: NonStrictName, cert_name: Optional[NonStrictName] = None) -> Sha256WithEcdsaSigner:
+        """
+        Get a signer for a key, using ``cert_name`` as the key locator if given
+        """
+        key_data = self.get_key(key_name)
+        cert_data = self.get_cert(cert_name) if cert_name is not None else None
+
+        cache_key = (Name.to_bytes(key_name), Name.to_bytes(cert_name) if cert_name is not None else None)
+        cached = self._signers.get(cache_key)
+        if cached is not None and cached[0] is key_data and cached[1] is cert_data:
+            return cached[2]
+
+        signer = _make_signer(key_data, cert_data)
+        self._signers[cache_key] = (key_data, cert_data, signer)
+        return signer
+
+    @staticmethod
+    def _current(index: dict[bytes, dict], paths: dict[bytes, str], name: NonStrictName,
+                 read: Callable[[str], dict]) -> dict:
+        name = Name.to_bytes(name)
+        if name not in paths:
+            raise KeyError(f'{Name.to_str(Name.from_bytes(name))} not found')
+        index[name] = read(paths[name])
+        return index[name]
+
+
+class NdndFileError(ValueError):
+    """
+    Raised when an NDN KEY/CERT file is malformed
+    """
+
+
+_HEADER_FIELDS = {"Name": "name", "SigType": "sig_type", "SignerKey": "signer_key", "Validity": "validity"}
+
+
+class NdndBlock:
+    """
+    One -----BEGIN NDN <TYPE>----- block of an ndnd key or cert file
+
+    Header fields are kept as strings; the name, signer key and DER bytes are
+    only parsed or decoded when first accessed.
+    """
+    __slots__ = ('type', 'headers', 'line_no', '_b64_lines', '_name', '_signer_key', '_der')
+
+    def __init__(self, block_type: str, headers: dict[str, str], b64_lines: list[str], line_no: int):
+        self.type = block_type
+        self.headers = headers
+        self.line_no = line_no
+        self._b64_lines = b64_lines
+        self._name = None
+        self._signer_key = None
+        self._der = None
+
+    @property
+    def name(self) -> FormalName:
+        if self._name is None:
+            self._name = Name.from_str(self._header("Name"))
+        return self._name
+
+    @property
+    def signer_key(self) -> Optional[FormalName]:
+        if self._signer_key is None and "SignerKey" in self.headers:
+            self._signer_key = Name.from_str(self.headers["SignerKey"])
+        return self._signer_key
+
+    @property
+    def sig_type(self) -> Optional[str]:
+        return self.headers.get("SigType")
+
+    @property
+    def validity(self) -> Optional[str]:
+        return self.headers.get("Validity")
+
+    @property
+    def der(self) -> bytes:
+        if self._der is None:
+            try:
+                self._der = base64.b64decode(''.join(self._b64_lines), validate=True)
+            except binascii.Error as e:
+                raise NdndFileError(f'Invalid base64 in NDN {self.type} block at line {self.line_no}: {e}') from None
+            self._b64_lines = None
+        return self._der
+
+    def _header(self, field: str) -> str:
+        try:
+            return self.headers[field]
+        except KeyError:
+            raise NdndFileError(f'NDN {self.type} block at line {self.line_no} has no {field} field') from None
+
+    def to_dict(self) -> dict:
+        """
+        Convert to the dictionary format returned by parse_ndnd_key and parse_ndnd_cert
+        """
+        result = {_HEADER_FIELDS[field]: value for field, value in self.headers.items() if field in _HEADER_FIELDS}
+        result["name"] = self.name
+        if "signer_key" in result:
+            result["signer_key"] = self.signer_key
+        result["key_data" if self.type == "KEY" else "cert_data"] = self.der
+        return result
+
+
+def iter_ndnd_blocks(lines: Iterable[str]) -> Iterator[NdndBlock]:
+    """
+    Parse ndnd key/cert text, one block at a time
+
+    ``lines`` can be an open file, so a bundle with many concatenated blocks
+    is never loaded into memory as a whole. Raises NdndFileError on malformed input.
+    """
+    block_type = None
+    headers: dict[str, str] = {}
+    b64_lines: list[str] = []
+    start = 0
+
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if block_type is None:
+            if not line:
+                continue
+            if not (line.startswith("-----BEGIN NDN ") and line.endswith("-----")):
+                raise NdndFileError(f'Expected -----BEGIN NDN ...----- at line {line_no}')
+            block_type = line[15:-5]
+            headers, b64_lines, start = {}, [], line_no
+        elif line.startswith("-----END NDN "):
+            if line != f"-----END NDN {block_type}-----":
+                raise NdndFileError(f'Mismatched {line} for NDN {block_type} block at line {start}')
+            if not b64_lines:
+                raise NdndFileError(f'NDN {block_type} block at line {start} has no data')
+            yield NdndBlock(block_type, headers, b64_lines, start)
+            block_type = None
+        elif not line:
+            continue
+        elif not b64_lines and ": " in line:
+            field, value = line.split(": ", 1)
+            headers[field] = value
+        else:
+            b64_lines.append(line)
+
+    if block_type is not None:
+        raise NdndFileError(f'NDN {block_type} block at line {start} is not terminated')
+
+
+def load_ndnd_file(path: str) -> Iterator[NdndBlock]:
+    """
+    Lazily iterate over the blocks of a key/cert file or trust bundle
+    """
+    with open(path, "r") as file:
+        yield from iter_ndnd_blocks(file)
+
+
+def _parse_single(text: str, block_type: str) -> dict:
+    blocks = iter_ndnd_blocks(text.splitlines())
+    block = next(blocks, None)
+    if block is None:
+        raise NdndFileError(f'No NDN {block_type} block found')
+    if block.type != block_type:
+        raise NdndFileError(f'Expected an NDN {block_type} block, found NDN {block.type}')
+    return block.to_dict()
+
+
 def parse_ndnd_key(key_str):
     """
     Parse NDN KEY string format
     Returns a dictionary with the parsed key fields
-    """    
-    # Normalize line endings and split
-    key_str = key_str.replace('\r\n', '\n')
-    lines = key_str.strip().split('\n')
-    
-    # Remove header and footer
-    if lines[0] == "-----BEGIN NDN KEY-----" and lines[-1] == "-----END NDN KEY-----":
-        lines = lines[1:-1]
-    
-    result = {}
-    
-    for line in lines:
-        if line.startswith("Name: "):
-            name_str = line[6:]
-            result["name"] = Name.from_str(name_str)
-        elif line.startswith("SigType: "):
-            result["sig_type"] = line[9:]
-    
-    # The rest of the lines are likely the key data in Base64
-    # Collect them and convert to bytes
-    key_data_lines = [line.strip() for line in lines if not line.startswith(("Name:", "SigType:"))]
-    key_data_str = ''.join(key_data_lines)
-    
-    # Convert to bytes
-    try:
-        result["key_data"] = base64.b64decode(key_data_str)
-    except:
-        # Fallback in case the encoding isn't standard base64
-        result["key_data"] = key_data_str.encode('utf-8')
-    
-    return result
+    """
+    return _parse_single(key_str, "KEY")
 
 
 def parse_ndnd_cert(cert_str):
@@ -69,45 +289,11 @@ def parse_ndnd_cert(cert_str):
     Parse NDN certificate string format
     Returns a dictionary with the parsed certificate fields
     """
-    
-    # Normalize line endings and split
-    cert_str = cert_str.replace('\r\n', '\n')
-    lines = cert_str.strip().split('\n')
-    
-    # Remove header and footer
-    if lines[0] == "-----BEGIN NDN CERT-----" and lines[-1] == "-----END NDN CERT-----":
-        lines = lines[1:-1]
-    
-    result = {}
-    
-    for line in lines:
-        if line.startswith("Name: "):
-            name_str = line[6:]
-            result["name"] = Name.from_str(name_str)
-        elif line.startswith("SigType: "):
-            result["sig_type"] = line[9:]
-        elif line.startswith("SignerKey: "):
-            signer_key_str = line[11:]
-            result["signer_key"] = Name.from_str(signer_key_str)
-        elif line.startswith("Validity: "):
-            validity_str = line[10:]
-            result["validity"] = validity_str
-    
-    # The rest of the lines are likely the certificate data in Base64
-    # Collect them and convert to bytes
-    cert_data_lines = [line.strip() for line in lines if not line.startswith(("Name:", "SigType:", "SignerKey:", "Validity:"))]
-    cert_data_str = ''.join(cert_data_lines)
-    
-    # Convert to bytes
-    try:
-        result["cert_data"] = base64.b64decode(cert_data_str)
-    except:
-        # Fallback in case the encoding isn't standard base64
-        result["cert_data"] = cert_data_str.encode('utf-8')
-    
-    return result
+    return _parse_single(cert_str, "CERT")
 
 
 # Example usage:
 if __name__ == "__main__":
     assert get_signer_from_ndnd_key('./ndnd-keys/foo.key', './ndnd-keys/foo.cert') is not None
+    store = KeyStore('./personal-keys')
+    assert store.get_signer(next(iter(store.keys)), next(iter(store.certs))) is not None
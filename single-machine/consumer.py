@@ -1,8 +1,15 @@
+import asyncio
 import logging
 import argparse
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Iterator
 from ndn import utils, appv2, types
 from ndn import encoding as enc
 from ndn.transport.udp_face import UdpFace
+from histogram import HdrHistogram
 
 
 logging.basicConfig(format='[{asctime}]{levelname}:{message}',
@@ -13,27 +20,124 @@ logging.basicConfig(format='[{asctime}]{levelname}:{message}',
 
 
 
-async def main(name: str):
+async def main(name: str, as_json: bool = False):
+    """
+    Express a single Interest. With ``as_json``, print one JSON record with the
+    outcome and RTT instead of human-readable output.
+    """
+    record = {'name': name, 'outcome': None, 'rtt_ms': None}
     try:
         timestamp = utils.timestamp()
         name = enc.Name.from_str(name)
-        print(f'Sending Interest {enc.Name.to_str(name)}, {enc.InterestParam(must_be_fresh=True, lifetime=6000)}')
+        if not as_json:
+            print(f'Sending Interest {enc.Name.to_str(name)}, {enc.InterestParam(must_be_fresh=True, lifetime=6000)}')
+        start = time.perf_counter()
         # TODO: Write a better validator
         data_name, content, pkt_context = await app.express(
             name, validator=appv2.pass_all,
             must_be_fresh=True, can_be_prefix=False, lifetime=6000)
+        record['rtt_ms'] = (time.perf_counter() - start) * 1000
+        record['outcome'] = 'data'
 
-        print(f'Received Data Name: {enc.Name.to_str(data_name)}')
-        print(pkt_context['meta_info'])
-        print(bytes(content) if content else None)
+        if not as_json:
+            print(f'Received Data Name: {enc.Name.to_str(data_name)}')
+            print(pkt_context['meta_info'])
+            print(bytes(content) if content else None)
     except types.InterestNack as e:
-        print(f'Nacked with reason={e.reason}')
+        record['outcome'] = 'nack'
+        record['reason'] = e.reason
+        if not as_json:
+            print(f'Nacked with reason={e.reason}')
     except types.InterestTimeout:
-        print(f'Timeout')
+        record['outcome'] = 'timeout'
+        if not as_json:
+            print(f'Timeout')
     except types.InterestCanceled:
-        print(f'Canceled')
+        record['outcome'] = 'canceled'
+        if not as_json:
+            print(f'Canceled')
     except types.ValidationFailure:
-        print(f'Data failed to validate')
+        record['outcome'] = 'invalid'
+        if not as_json:
+            print(f'Data failed to validate')
+    finally:
+        if as_json:
+            print(json.dumps(record), flush=True)
+        app.shutdown()
+
+
+def load_names(names_file: str | None, template: str, count: int) -> Iterator[enc.FormalName]:
+    """
+    Yield ``count`` Interest names, cycling through ``names_file`` if given,
+    otherwise formatting ``template`` with the Interest index ``i``.
+    """
+    if names_file:
+        with open(names_file, 'r') as file:
+            names = [enc.Name.from_str(line.strip()) for line in file if line.strip()]
+        if not names:
+            raise ValueError(f'No names in {names_file}')
+        yield from itertools.islice(itertools.cycle(names), count)
+    else:
+        for i in range(count):
+            yield enc.Name.from_str(template.format(i=i))
+
+
+async def load_main(names: Iterator[enc.FormalName], window: int, rate: float, lifetime: int):
+    """
+    Express Interests with at most ``window`` outstanding and, if ``rate`` is set,
+    at most ``rate`` Interests per second. Reports throughput and latency percentiles.
+    """
+    histogram = HdrHistogram()
+    outcomes = Counter()
+    nack_reasons = Counter()
+    in_flight = asyncio.Semaphore(window)
+    tasks = set()
+
+    async def fetch(name: enc.FormalName):
+        start = time.perf_counter()
+        try:
+            await app.express(name, validator=appv2.pass_all,
+                              must_be_fresh=True, can_be_prefix=False, lifetime=lifetime)
+            histogram.record((time.perf_counter() - start) * 1_000_000)
+            outcomes['data'] += 1
+        except types.InterestNack as e:
+            outcomes['nack'] += 1
+            nack_reasons[e.reason] += 1
+        except types.InterestTimeout:
+            outcomes['timeout'] += 1
+        except types.InterestCanceled:
+            outcomes['canceled'] += 1
+        except types.ValidationFailure:
+            outcomes['invalid'] += 1
+        finally:
+            in_flight.release()
+
+    try:
+        start = time.perf_counter()
+        for i, name in enumerate(names):
+            if rate > 0:
+                delay = start + i / rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await in_flight.acquire()
+            task = asyncio.create_task(fetch(name))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+        sent = sum(outcomes.values())
+        print(f'Sent {sent} Interests in {elapsed:.3f}s: {sent / elapsed:.1f} Interests/s, '
+              f'{outcomes["data"] / elapsed:.1f} Data/s')
+        print(f'Data={outcomes["data"]} Nack={outcomes["nack"]} Timeout={outcomes["timeout"]} '
+              f'Canceled={outcomes["canceled"]} Invalid={outcomes["invalid"]}')
+        if nack_reasons:
+            print('Nack reasons: ' + ', '.join(f'{reason}={n}' for reason, n in sorted(nack_reasons.items())))
+        if histogram.count:
+            print(f'Latency (ms): min={histogram.min / 1000:.3f} mean={histogram.mean / 1000:.3f} '
+                  f'p50={histogram.percentile(50) / 1000:.3f} p99={histogram.percentile(99) / 1000:.3f} '
+                  f'p999={histogram.percentile(99.9) / 1000:.3f} max={histogram.max / 1000:.3f}')
     finally:
         app.shutdown()
 
@@ -48,9 +152,31 @@ if __name__ == '__main__':
         default='/foo/bar/baz',
         help='NDN name to consume (default: /foo/bar/baz)'
     )
+    parser.add_argument('--json', action='store_true', default=False,
+                        help='Print the outcome and RTT of the single Interest as one JSON record')
+    parser.add_argument('--load', action='store_true', default=False,
+                        help='Send many Interests and report throughput and latency instead of a single Interest')
+    parser.add_argument('--names-file', type=str, default=None,
+                        help='Load mode: file with one Interest name per line, used in a cycle')
+    parser.add_argument('--template', type=str, default=None,
+                        help='Load mode: name template formatted with the Interest index {i} '
+                             '(default: <name>/{i})')
+    parser.add_argument('--count', type=int, default=10000,
+                        help='Load mode: number of Interests to send (default: 10000)')
+    parser.add_argument('--window', type=int, default=100,
+                        help='Load mode: maximum number of outstanding Interests (default: 100)')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Load mode: Interests per second, 0 for as fast as the window allows (default: 0)')
+    parser.add_argument('--lifetime', type=int, default=6000,
+                        help='Load mode: Interest lifetime in milliseconds (default: 6000)')
     args = parser.parse_args()
 
     global app
     app = appv2.NDNApp(UdpFace(port=args.port))
 
-    app.run_forever(after_start=main(args.name))
+    if args.load:
+        template = args.template if args.template else args.name.rstrip('/') + '/{i}'
+        names = load_names(args.names_file, template, args.count)
+        app.run_forever(after_start=load_main(names, args.window, args.rate, args.lifetime))
+    else:
+        app.run_forever(after_start=main(args.name, args.json))
@@ -0,0 +1,55 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from ndn.encoding import BinaryStr
+
+
+class ContentStore:
+    """
+    Producer-side cache of encoded Data packets keyed by Name wire encoding.
+
+    Entries are evicted least-recently-used first once either ``max_entries`` or
+    ``max_bytes`` is exceeded. An entry stays usable for Interests without MustBeFresh
+    until evicted, and for MustBeFresh Interests only within its FreshnessPeriod.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        # name -> (wire, fresh until in seconds on the monotonic clock)
+        self._entries: OrderedDict[bytes, tuple[bytes, float]] = OrderedDict()
+
+    def get(self, name: bytes, must_be_fresh: bool = False) -> Optional[bytes]:
+        entry = self._entries.get(name)
+        if entry is None or (must_be_fresh and time.monotonic() >= entry[1]):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, name: bytes, wire: BinaryStr, freshness_period: Optional[int] = None) -> None:
+        """
+        Store an encoded Data packet. ``freshness_period`` is in milliseconds, as in MetaInfo.
+        """
+        wire = bytes(wire)
+        if len(wire) > self.max_bytes:
+            return
+        self.remove(name)
+        fresh_until = time.monotonic() + (freshness_period or 0) / 1000
+        self._entries[name] = (wire, fresh_until)
+        self.size += len(wire)
+        while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def remove(self, name: bytes) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def __len__(self) -> int:
+        return len(self._entries)
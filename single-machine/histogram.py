@@ -0,0 +1,78 @@
+from typing import Optional
+
+
+class HdrHistogram:
+    """
+    Log-linear histogram in the style of HdrHistogram, for latencies in microseconds.
+
+    Values below ``2 ** sub_bucket_bits`` are counted exactly. Above that, each power of two
+    is split into ``2 ** (sub_bucket_bits - 1)`` buckets, so a recorded value is off by at most
+    ``2 ** -(sub_bucket_bits - 1)`` (under 1% with the default of 8 bits).
+    Values above ``max_value`` are clamped to it.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 8, max_value: int = 3600_000_000):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.max_value = max_value
+        self.counts = [0] * (self._index(max_value) + 1)
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def _index(self, value: int) -> int:
+        bits = self.sub_bucket_bits
+        if value < 1 << bits:
+            return value
+        shift = value.bit_length() - bits
+        half = 1 << (bits - 1)
+        return (1 << bits) + (shift - 1) * half + (value >> shift) - half
+
+    def _highest_equivalent(self, index: int) -> int:
+        bits = self.sub_bucket_bits
+        if index < 1 << bits:
+            return index
+        half = 1 << (bits - 1)
+        shift, offset = divmod(index - (1 << bits), half)
+        shift += 1
+        return ((offset + half + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        value = min(max(0, int(value)), self.max_value)
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: 'HdrHistogram') -> None:
+        if (other.sub_bucket_bits, other.max_value) != (self.sub_bucket_bits, self.max_value):
+            raise ValueError('Cannot merge histograms with different layouts')
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def percentile(self, percent: float) -> int:
+        """
+        Return the value at or below which ``percent`` percent of recorded values fall.
+        """
+        if self.count == 0:
+            return 0
+        target = max(1, round(self.count * percent / 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(self._highest_equivalent(i), self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
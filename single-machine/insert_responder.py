@@ -0,0 +1,263 @@
+import asyncio
+import random
+from typing import Iterable, Optional
+from Cryptodome.PublicKey import ECC
+from ndn.appv2 import NDNApp, ReplyFunc, PktContext, pass_all
+from ndn.encoding import (BinaryStr, FormalName, SignaturePtrs, SignatureType, DecodeError, parse_data,
+                          parse_tl_num, get_tl_num_size, write_tl_num)
+from ndn.app_support.nfd_mgmt import ControlParametersValue, ControlResponse
+from ndn.security import NullSigner
+from ndn.security.validator.known_key_validator import verify_ecdsa
+from ndn.transport.face import Face
+
+TLV_DATA = 0x06
+TLV_STAPLED_CERTIFICATE = 0x216
+# Certificates followed from the insertion object's signer towards a trust anchor
+MAX_CHAIN_LENGTH = 8
+
+
+class LoopbackFace(Face):
+    """
+    An in-process face whose packets are delivered to a peer LoopbackFace.
+    Used to run a client NDNApp against a stand-in responder without a forwarder.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.peer: Optional['LoopbackFace'] = None
+        self._closed: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def pair() -> tuple['LoopbackFace', 'LoopbackFace']:
+        a, b = LoopbackFace(), LoopbackFace()
+        a.peer, b.peer = b, a
+        return a, b
+
+    async def open(self):
+        self._closed = asyncio.get_running_loop().create_future()
+        self.running = True
+
+    def shutdown(self):
+        self.running = False
+        if self._closed is not None and not self._closed.done():
+            self._closed.set_result(None)
+
+    def send(self, data: bytes):
+        if self.peer is not None and self.peer.running:
+            asyncio.get_running_loop().call_soon(self.peer._deliver, bytes(data))
+
+    def _deliver(self, data: bytes):
+        typ, _ = parse_tl_num(data)
+        asyncio.create_task(self.callback(typ, data))
+
+    async def run(self):
+        await self._closed
+
+    def isLocalFace(self):
+        return True
+
+
+def make_control_response(status_code: int, status_text: str) -> bytes:
+    """
+    Encode a ControlResponse (TLV-TYPE 0x65) as parsed by nfd_mgmt.parse_response.
+    """
+    cr = ControlResponse()
+    cr.status_code = status_code
+    cr.status_text = status_text
+    cr.body = ControlParametersValue()
+    value = cr.encode()
+    wire = bytearray(get_tl_num_size(0x65) + get_tl_num_size(len(value)) + len(value))
+    pos = write_tl_num(0x65, wire)
+    pos += write_tl_num(len(value), wire, pos)
+    wire[pos:] = value
+    return bytes(wire)
+
+
+def split_insertion(app_param: BinaryStr) -> tuple[bytes, list[bytes]]:
+    """
+    Split the ApplicationParameters of an insertion Interest into the insertion object Data
+    and the certificates of the StapledCertificate TLVs that follow it.
+    Raises DecodeError if the parameters are malformed.
+    """
+    app_param = bytes(app_param)
+    typ, pos = parse_tl_num(app_param)
+    if typ != TLV_DATA:
+        raise DecodeError('Insertion object is not a Data packet')
+    length, size = parse_tl_num(app_param, pos)
+    end = pos + size + length
+    if end > len(app_param):
+        raise DecodeError('Insertion object is truncated')
+    ins_obj = app_param[:end]
+    certs = []
+    pos = end
+    while pos < len(app_param):
+        typ, size = parse_tl_num(app_param, pos)
+        pos += size
+        length, size = parse_tl_num(app_param, pos)
+        pos += size
+        if typ != TLV_STAPLED_CERTIFICATE or pos + length > len(app_param):
+            raise DecodeError('Malformed StapledCertificate')
+        certs.append(app_param[pos:pos + length])
+        pos += length
+    return ins_obj, certs
+
+
+class InsertResponder:
+    """
+    Stand-in for the forwarder's /routing/insert handler.
+
+    By default it answers every insertion Interest with a fixed status code after ``delay``
+    seconds. It can also:
+
+    - add up to ``jitter`` seconds of uniformly distributed extra delay,
+    - drop a ``loss`` fraction of Interests, so the client times out,
+    - answer an ``error_rate`` fraction with ``error_code``/``error_text``,
+    - verify the insertion object: its ECDSA signature and those of the stapled chain up to
+      one of ``trust_anchors`` (certificate wires), and with a ``validator``
+      (an lvs_validator.InsertionValidator) the schema rules. Objects that fail are answered
+      with 403; unparsable parameters with 400.
+
+    ``seed`` makes loss and error injection reproducible.
+    """
+
+    def __init__(self, app: NDNApp, status_code: int = 200, status_text: str = 'OK', delay: float = 0.0,
+                 jitter: float = 0.0, loss: float = 0.0, error_rate: float = 0.0,
+                 error_code: int = 500, error_text: str = 'Internal error',
+                 trust_anchors: Optional[Iterable[BinaryStr]] = None, validator=None,
+                 seed: Optional[int] = None):
+        self.app = app
+        self.status_code = status_code
+        self.status_text = status_text
+        self.delay = delay
+        self.jitter = jitter
+        self.loss = loss
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.error_text = error_text
+        self.validator = validator
+        self.verify = trust_anchors is not None
+        # (certificate name components, certificate wire) of the anchors; verified certificate wires
+        self._anchors = [self._named(cert) for cert in trust_anchors or []]
+        self._verified: set[bytes] = {cert for _, cert in self._anchors}
+        self._keys: dict[bytes, ECC.EccKey] = {}
+        self._rng = random.Random(seed)
+        self.n_received = 0
+        self.n_dropped = 0
+        # Status code -> number of replies sent with it
+        self.statuses: dict[int, int] = {}
+        app.attach_handler('/routing/insert', self.on_interest, validator=pass_all)
+
+    def on_interest(self, name: FormalName, app_param: Optional[BinaryStr], reply: ReplyFunc,
+                    context: PktContext) -> None:
+        self.n_received += 1
+        if self.loss > 0 and self._rng.random() < self.loss:
+            self.n_dropped += 1
+            return
+
+        status_code, status_text = self.handle(app_param)
+        self.statuses[status_code] = self.statuses.get(status_code, 0) + 1
+        content = make_control_response(status_code, status_text)
+        data = self.app.make_data(name, content=content, signer=NullSigner())
+        delay = self.delay + (self._rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, reply, data)
+        else:
+            reply(data)
+
+    def handle(self, app_param: Optional[BinaryStr]) -> tuple[int, str]:
+        """
+        Status code and text for one insertion
+        """
+        if self.error_rate > 0 and self._rng.random() < self.error_rate:
+            return self.error_code, self.error_text
+        if not self.verify and self.validator is None:
+            return self.status_code, self.status_text
+
+        if not app_param:
+            return 400, 'Missing insertion object'
+        try:
+            ins_obj, certs = split_insertion(app_param)
+            obj_name, _, _, sig_ptrs = parse_data(ins_obj)
+            stapled = [self._named(cert) for cert in certs]
+        except (DecodeError, IndexError, ValueError):
+            return 400, 'Malformed insertion object'
+
+        key_locator = sig_ptrs.signature_info.key_locator if sig_ptrs.signature_info else None
+        if key_locator is None or key_locator.name is None:
+            return 403, 'Insertion object has no KeyLocator'
+        if self.verify and not self._verify(sig_ptrs, key_locator.name, stapled, MAX_CHAIN_LENGTH):
+            return 403, 'Signature verification failed'
+        # The schema describes <prefix>/32=PA, without the version and segment
+        if self.validator is not None and not self.validator.check(obj_name[:-2], key_locator.name):
+            return 403, 'Insertion object violates the trust schema'
+        return self.status_code, self.status_text
+
+    @staticmethod
+    def _named(cert: BinaryStr) -> tuple[tuple[bytes, ...], bytes]:
+        return tuple(bytes(component) for component in parse_data(cert)[0]), bytes(cert)
+
+    def _find_cert(self, key_name: FormalName, stapled: list[tuple]) -> Optional[bytes]:
+        """
+        A trust anchor or stapled certificate whose name starts with ``key_name`` (a key or certificate name)
+        """
+        key_name = tuple(bytes(component) for component in key_name)
+        for cert_name, cert in self._anchors + stapled:
+            if cert_name[:len(key_name)] == key_name:
+                return cert
+        return None
+
+    def _verify(self, sig_ptrs: SignaturePtrs, key_name: FormalName, stapled: list[tuple],
+                remaining: int) -> bool:
+        """
+        Verify a signature with the certificate ``key_name`` refers to, then that certificate's
+        own signature, until a trust anchor or an already verified certificate is reached
+        """
+        if remaining == 0 or sig_ptrs.signature_info.signature_type != SignatureType.SHA256_WITH_ECDSA:
+            return False
+        cert = self._find_cert(key_name, stapled)
+        if cert is None:
+            return False
+        _, _, pub_key, cert_sig_ptrs = parse_data(cert)
+        key = self._keys.get(cert)
+        if key is None:
+            try:
+                key = self._keys[cert] = ECC.import_key(bytes(pub_key))
+            except ValueError:
+                return False
+        if not verify_ecdsa(key, sig_ptrs):
+            return False
+        if cert in self._verified:
+            return True
+        cert_key_locator = cert_sig_ptrs.signature_info.key_locator
+        if cert_key_locator is None or cert_key_locator.name is None:
+            return False
+        if not self._verify(cert_sig_ptrs, cert_key_locator.name, stapled, remaining - 1):
+            return False
+        self._verified.add(cert)
+        return True
+
+
+async def run_with_responder(after_start, responder_factory=InsertResponder):
+    """
+    Run ``after_start(client_app)`` with a client NDNApp connected to a stand-in responder.
+    Returns the result of ``after_start`` and the responder.
+    """
+    client_face, responder_face = LoopbackFace.pair()
+    client_app = NDNApp(client_face)
+    responder_app = NDNApp(responder_face)
+    responder = responder_factory(responder_app)
+
+    result = None
+
+    async def client_task():
+        nonlocal result
+        try:
+            result = await after_start(client_app)
+        finally:
+            client_app.shutdown()
+            responder_app.shutdown()
+
+    responder_task = asyncio.create_task(responder_app.main_loop())
+    await client_app.main_loop(after_start=client_task())
+    await responder_task
+    return result, responder
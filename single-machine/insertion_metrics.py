@@ -0,0 +1,124 @@
+import json
+from typing import Optional
+from histogram import HdrHistogram
+
+# Metric name -> (type, help, scale). Histograms record integers, so values are stored
+# multiplied by ``scale`` and divided by it again on export.
+INSERTION_METRICS = {
+    'insertions_total': ('counter', 'Insertion and withdrawal attempts by outcome and status code', 1),
+    'insertion_retries_total': ('counter', 'Insertion Interests re-sent after a timeout or Nack', 1),
+    'insertion_rtt_seconds': ('summary', 'Round-trip time of the last insertion Interest', 1_000_000),
+    'insertion_object_bytes': ('summary', 'Size of the insertion ApplicationParameters', 1),
+}
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+class MetricsRegistry:
+    """
+    In-process counters and latency histograms, keyed by metric name and labels.
+
+    A batch inserter records every InsertionResult into one registry (or merges per-worker
+    registries), and the totals can be exported as Prometheus text or JSON.
+    Nothing here is thread-safe; record from a single event loop.
+    """
+
+    def __init__(self, prefix: str = 'ndn_'):
+        self.prefix = prefix
+        self.metrics = dict(INSERTION_METRICS)
+        self.counters: dict[tuple[str, tuple], int] = {}
+        self.histograms: dict[tuple[str, tuple], HdrHistogram] = {}
+
+    def describe(self, name: str, kind: str, help_text: str, scale: int = 1) -> None:
+        self.metrics[name] = (kind, help_text, scale)
+
+    def inc(self, name: str, value: int = 1, labels: Optional[dict[str, str]] = None) -> None:
+        key = (name, tuple(sorted((labels or {}).items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def counts_by(self, name: str, label: str) -> dict[str, int]:
+        """
+        Totals of a counter per value of one of its labels
+        """
+        totals = {}
+        for (metric, labels), value in self.counters.items():
+            if metric == name:
+                key = dict(labels).get(label, '')
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def observe(self, name: str, value: float, labels: Optional[dict[str, str]] = None) -> None:
+        key = (name, tuple(sorted((labels or {}).items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = HdrHistogram()
+        histogram.record(value * self.metrics.get(name, (None, None, 1))[2])
+
+    def record_insertion(self, result) -> None:
+        """
+        Count a prefix_insertion_client.InsertionResult
+        """
+        self.inc('insertions_total', labels={'outcome': result.outcome, 'status': str(result.status_code or '')})
+        if result.retries:
+            self.inc('insertion_retries_total', result.retries)
+        if result.rtt is not None:
+            self.observe('insertion_rtt_seconds', result.rtt)
+        if result.size:
+            self.observe('insertion_object_bytes', result.size)
+
+    def merge(self, other: 'MetricsRegistry') -> None:
+        self.metrics.update(other.metrics)
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, histogram in other.histograms.items():
+            if key not in self.histograms:
+                self.histograms[key] = HdrHistogram(histogram.sub_bucket_bits, histogram.max_value)
+            self.histograms[key].merge(histogram)
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format. Histograms are exported as summaries with fixed quantiles.
+        """
+        lines = []
+        for name, (kind, help_text, scale) in self.metrics.items():
+            counters = sorted((labels, value) for (metric, labels), value in self.counters.items() if metric == name)
+            histograms = sorted(((labels, h) for (metric, labels), h in self.histograms.items() if metric == name),
+                                key=lambda item: item[0])
+            if not counters and not histograms:
+                continue
+            full_name = self.prefix + name
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            for labels, value in counters:
+                lines.append(f'{full_name}{_labels(labels)} {value}')
+            for labels, histogram in histograms:
+                for quantile in QUANTILES:
+                    value = histogram.percentile(quantile * 100) / scale
+                    lines.append(f'{full_name}{_labels(labels + (("quantile", str(quantile)),))} {value:g}')
+                lines.append(f'{full_name}_sum{_labels(labels)} {histogram.total / scale:g}')
+                lines.append(f'{full_name}_count{_labels(labels)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_dict(self) -> dict:
+        result = {}
+        for (name, labels), value in self.counters.items():
+            result.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+        for (name, labels), histogram in self.histograms.items():
+            scale = self.metrics.get(name, (None, None, 1))[2]
+            summary = {'labels': dict(labels), 'count': histogram.count, 'sum': histogram.total / scale}
+            if histogram.count:
+                summary.update(min=histogram.min / scale, max=histogram.max / scale, mean=histogram.mean / scale)
+                summary.update({f'p{quantile * 100:g}': histogram.percentile(quantile * 100) / scale
+                                for quantile in QUANTILES})
+            result.setdefault(name, []).append(summary)
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=4)
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
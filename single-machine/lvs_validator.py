@@ -0,0 +1,217 @@
+from typing import Iterable, Iterator, Optional
+from ndn.app_support.light_versec import DEFAULT_USER_FNS, LvsModel, LvsModelError, UserFn
+from ndn.app_support.security_v2 import parse_certificate
+from ndn.encoding import BinaryStr, Component, FormalName, Name, NonStrictName
+from prefix_insertion_client import StapledCertBundle
+
+INSERT_COMPONENT = bytes(Component.from_str('32=PA'))
+
+
+class InsertionValidator:
+    """
+    Client-side check of insertion objects against a compiled LVS schema such as insert.tlv.
+
+    The binary model is compiled once into a trie of plain Python objects: value edges become
+    dict lookups on component bytes and constraints become sets, so a check takes microseconds.
+    Matching follows python-ndn's LVS Checker: the key name is matched with the pattern
+    values bound while matching the packet name, and the key's node must be one the packet's
+    node allows as a signer.
+
+    KeyLocators that hold a key name (``.../KEY/<id>``, as ndnd writes them) are resolved to
+    the name of the stapled certificate or ``trust_anchors`` certificate (wires) of that key,
+    since schema rules such as ``#KEY: "KEY"/_/_/_`` describe certificate names.
+    """
+
+    def __init__(self, model: LvsModel, user_fns: Optional[dict[str, UserFn]] = None,
+                 trust_anchors: Optional[Iterable[BinaryStr]] = None):
+        self.user_fns = DEFAULT_USER_FNS | (user_fns or {})
+        self.anchor_names = [self._components(parse_certificate(cert).name) for cert in trust_anchors or []]
+        self.start_id = model.start_id
+        named_cnt = model.named_pattern_cnt or 0
+        # node id -> (value edges {component: dest}, pattern edges, signer node ids)
+        self._nodes: dict[int, tuple[dict[bytes, int], list[tuple], frozenset[int]]] = {}
+        for node in model.nodes:
+            v_edges = {}
+            for edge in node.v_edges:
+                v_edges.setdefault(bytes(edge.value), edge.dest)
+            p_edges = [(edge.tag, edge.dest, [self._compile_constraint(cons) for cons in edge.cons_sets],
+                        edge.tag <= named_cnt)
+                       for edge in node.p_edges]
+            self._nodes[node.id] = (v_edges, p_edges, frozenset(node.sign_cons))
+        self._remaining = self._remaining_lengths(model)
+        # Result of the stapled chain check and the stapled certificate names, by bundle wire
+        self._chains: dict[bytes, tuple[bool, list[tuple[bytes, ...]]]] = {}
+        # Key nodes matched by a key name under the pattern values bound by the packet name
+        self._key_matches: dict[tuple, frozenset[int]] = {}
+
+    def _remaining_lengths(self, model: LvsModel) -> dict[int, frozenset[int]]:
+        """
+        For every node, the numbers of further components that lead to a node a check can
+        end at (one with signing constraints, or a signer). Edges into subtrees that cannot
+        consume exactly the rest of a name are skipped while matching.
+        """
+        signers = {signer for _, _, node_signers in self._nodes.values() for signer in node_signers}
+        children = {node_id: [dest for dest in v_edges.values()] + [edge[1] for edge in p_edges]
+                    for node_id, (v_edges, p_edges, _) in self._nodes.items()}
+        remaining: dict[int, frozenset[int]] = {}
+
+        def visit(node_id: int) -> frozenset[int]:
+            if node_id not in remaining:
+                lengths = {0} if self._nodes[node_id][2] or node_id in signers else set()
+                for child in children[node_id]:
+                    lengths |= {length + 1 for length in visit(child)}
+                remaining[node_id] = frozenset(lengths)
+            return remaining[node_id]
+
+        for node in model.nodes:
+            visit(node.id)
+        return remaining
+
+    @staticmethod
+    def from_file(path: str, user_fns: Optional[dict[str, UserFn]] = None,
+                  trust_anchors: Optional[Iterable[BinaryStr]] = None) -> 'InsertionValidator':
+        with open(path, 'rb') as f:
+            return InsertionValidator(LvsModel.parse(f.read()), user_fns, trust_anchors)
+
+    def _compile_constraint(self, cons) -> tuple[frozenset[bytes], tuple[int, ...], tuple]:
+        values, tags, fns = set(), [], []
+        for op in cons.options:
+            if op.value is not None:
+                values.add(bytes(op.value))
+            elif op.tag is not None:
+                tags.append(op.tag)
+            else:
+                if op.fn.fn_id not in self.user_fns:
+                    raise LvsModelError(f'User function {op.fn.fn_id} is undefined')
+                args = tuple((arg.tag, bytes(arg.value) if arg.value is not None else None) for arg in op.fn.args)
+                fns.append((self.user_fns[op.fn.fn_id], args))
+        return frozenset(values), tuple(tags), tuple(fns)
+
+    @staticmethod
+    def _satisfies(value: bytes, context: dict[int, bytes], constraints: list[tuple]) -> bool:
+        for values, tags, fns in constraints:
+            if value in values:
+                continue
+            if any(context.get(tag) == value for tag in tags):
+                continue
+            if any(fn(value, [context.get(tag, arg) for tag, arg in args]) for fn, args in fns):
+                continue
+            return False
+        return True
+
+    def _match(self, name: tuple[bytes, ...], depth: int, node_id: int,
+               context: dict[int, bytes]) -> Iterator[tuple[int, dict[int, bytes]]]:
+        if depth == len(name):
+            yield node_id, context
+            return
+        value = name[depth]
+        rest = len(name) - depth - 1
+        v_edges, p_edges, _ = self._nodes[node_id]
+        dest = v_edges.get(value)
+        if dest is not None and rest in self._remaining[dest]:
+            yield from self._match(name, depth + 1, dest, context)
+        for tag, dest, constraints, named in p_edges:
+            if rest not in self._remaining[dest]:
+                continue
+            bound = context.get(tag)
+            if bound is not None:
+                if bound == value:
+                    yield from self._match(name, depth + 1, dest, context)
+            elif self._satisfies(value, context, constraints):
+                yield from self._match(name, depth + 1, dest, context | {tag: value} if named else context)
+
+    @staticmethod
+    def _components(name: NonStrictName) -> tuple[bytes, ...]:
+        name = Name.normalize(name)
+        if name and Component.get_type(name[-1]) == Component.TYPE_IMPLICIT_SHA256:
+            name = name[:-1]
+        return tuple(bytes(component) for component in name)
+
+    def check(self, pkt_name: NonStrictName, key_name: NonStrictName) -> bool:
+        """
+        Whether the schema allows the key (or certificate) ``key_name`` to sign ``pkt_name``
+        """
+        pkt_name = self._components(pkt_name)
+        key_name = self._components(key_name)
+        for pkt_node, context in self._match(pkt_name, 0, self.start_id, {}):
+            signers = self._nodes[pkt_node][2]
+            if signers and not signers.isdisjoint(self._match_key(key_name, context)):
+                return True
+        return False
+
+    def _match_key(self, key_name: tuple[bytes, ...], context: dict[int, bytes]) -> frozenset[int]:
+        cache_key = (key_name, tuple(sorted(context.items())))
+        nodes = self._key_matches.get(cache_key)
+        if nodes is None:
+            nodes = frozenset(node for node, _ in self._match(key_name, 0, self.start_id, context))
+            if len(self._key_matches) >= 4096:
+                self._key_matches.clear()
+            self._key_matches[cache_key] = nodes
+        return nodes
+
+    def check_chain(self, cert_bundle: StapledCertBundle) -> bool:
+        """
+        Whether every stapled certificate may be signed by the key its KeyLocator names.
+        The result is kept per bundle content.
+        """
+        return self._chain(cert_bundle)[0]
+
+    def _chain(self, cert_bundle: StapledCertBundle) -> tuple[bool, list[tuple[bytes, ...]]]:
+        """
+        The chain check result and the names of the stapled certificates, parsed once per bundle content
+        """
+        key = bytes(cert_bundle.wire)
+        chain = self._chains.get(key)
+        if chain is None:
+            valid = True
+            certs = [parse_certificate(cert) for cert in cert_bundle.certs]
+            cert_names = [self._components(cert_data.name) for cert_data in certs]
+            for cert_data, cert_name in zip(certs, cert_names):
+                key_locator = cert_data.signature_info.key_locator
+                if key_locator is None or key_locator.name is None:
+                    valid = False
+                    break
+                if not self.check(cert_name, self._resolve(key_locator.name, cert_names)):
+                    valid = False
+                    break
+            chain = self._chains[key] = (valid, cert_names)
+        return chain
+
+    def _resolve(self, key_name: NonStrictName, cert_names: list[tuple[bytes, ...]]) -> tuple[bytes, ...]:
+        """
+        The name of the first stapled or trust anchor certificate under ``key_name``, or
+        ``key_name`` itself if there is none (e.g. it already is a certificate name)
+        """
+        key_name = self._components(key_name)
+        for cert_name in cert_names + self.anchor_names:
+            if cert_name[:len(key_name)] == key_name:
+                return cert_name
+        return key_name
+
+    def _stapled_names(self, cert_bundle: Optional[StapledCertBundle]) -> list[tuple[bytes, ...]]:
+        if cert_bundle is None:
+            return []
+        return self._chain(cert_bundle)[1]
+
+    def check_insertion(self, name: NonStrictName, signer_name: NonStrictName,
+                        cert_bundle: Optional[StapledCertBundle] = None) -> bool:
+        """
+        Whether an insertion object for prefix ``name`` (named ``<name>/32=PA``, the name the
+        schema describes, before the version and segment) may be signed by ``signer_name``,
+        and the stapled chain, if any, is allowed too.
+        """
+        if cert_bundle is not None and not self.check_chain(cert_bundle):
+            return False
+        signer_name = self._resolve(signer_name, self._stapled_names(cert_bundle))
+        return self.check(self._components(name) + (INSERT_COMPONENT,), signer_name)
+
+    def invalid_prefixes(self, names: list[NonStrictName], signer_name: NonStrictName,
+                         cert_bundle: Optional[StapledCertBundle] = None) -> list[FormalName]:
+        """
+        The prefixes of a batch whose insertion objects the schema would reject
+        """
+        if cert_bundle is not None and not self.check_chain(cert_bundle):
+            return [Name.normalize(name) for name in names]
+        signer_name = self._resolve(signer_name, self._stapled_names(cert_bundle))
+        return [Name.normalize(name) for name in names
+                if not self.check(self._components(name) + (INSERT_COMPONENT,), signer_name)]
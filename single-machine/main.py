@@ -3,16 +3,23 @@ import os
 import signal
 import sys
 import argparse
+import multiprocessing
 from typing import Optional
 from ndn.appv2 import NDNApp, ReplyFunc, PktContext
 from ndn.security import NullSigner
 from ndn.transport.udp_face import UdpFace
 from ndn.encoding import BinaryStr, FormalName, Component, Signer, Name
-from prefix_insertion_client import insert_prefix # Assuming this is your custom module
-from cert_util import get_signer_from_ndnd_key, parse_ndnd_cert # Assuming this is your custom module
+from prefix_insertion_client import StapledCertBundle # Assuming this is your custom module
+from prefix_insertion_manager import PrefixInsertionManager
+from insertion_metrics import MetricsRegistry
+from cert_util import get_signer_from_ndnd_key, read_ndnd_cert # Assuming this is your custom module
+from content_store import ContentStore
 
 app: Optional[NDNApp] = None
 
+# Counters replace per-Interest logging; they are printed every --stats-interval seconds
+stats = {'interests': 0, 'replies': 0, 'cache_hits': 0}
+
 def handle_signal(signal_num, frame) -> None:
     print()
     print('Ctrl-C, stopping')
@@ -25,8 +32,6 @@ def handle_signal(signal_num, frame) -> None:
 
 
 def main() -> None:
-    signal.signal(signal.SIGINT, handle_signal)
-
     parser = argparse.ArgumentParser(description="NDN Application with Prefix Insertion")
     parser.add_argument(
         '--port',
@@ -64,30 +69,135 @@ def main() -> None:
         default=60,
         help='Duration in seconds to keep the prefix inserted before removal (default: 60)'
     )
+    parser.add_argument(
+        '--expiration',
+        type=int,
+        default=24 * 3600_000,
+        help='Expiration of each insertion in milliseconds; the prefix is refreshed before it expires '
+             '(default: 86400000)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of producer processes. With N > 1, process k inserts and serves <prefix>/k '
+             'on its own face (default: 1)'
+    )
+    parser.add_argument(
+        '--stats-interval',
+        type=float,
+        default=10,
+        help='Seconds between Interest counter reports, 0 to disable (default: 10)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        default=None,
+        help='Rewrite insertion metrics in Prometheus text format to this file at every report; '
+             'with --workers, each process appends its shard number to the name'
+    )
+    parser.add_argument(
+        '--log-every',
+        type=int,
+        default=0,
+        help='Print the name of every Nth received Interest, 0 to disable (default: 0)'
+    )
+    parser.add_argument(
+        '--freshness',
+        type=int,
+        default=0,
+        help='FreshnessPeriod of produced Data in milliseconds. Cached Data answers MustBeFresh '
+             'Interests only within this period (default: 0)'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=10000,
+        help='Maximum number of encoded Data packets kept by the producer, 0 to disable. '
+             'Only used with a --freshness above 0 (default: 10000)'
+    )
     args = parser.parse_args()
 
+    if args.workers > 1:
+        run_sharded(args)
+    else:
+        run_producer(args, args.prefix)
+
+
+def run_sharded(args: argparse.Namespace) -> None:
+    shards = [f"{args.prefix.rstrip('/')}/{k}" for k in range(args.workers)]
+    workers = [multiprocessing.Process(target=run_producer, args=(args, shard), name=f'producer-{shard}')
+               for shard in shards]
+    for worker in workers:
+        worker.start()
+    print(f'Started {len(workers)} producer processes for {", ".join(shards)}')
+
+    # Each worker handles Ctrl-C itself; the parent only waits for them
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    for worker in workers:
+        worker.join()
+
+
+def run_producer(args: argparse.Namespace, prefix: str) -> None:
+    signal.signal(signal.SIGINT, handle_signal)
+
     face = UdpFace(port=args.port)
+    metrics_file = args.metrics_file
+    if metrics_file and args.workers > 1:
+        metrics_file = f'{metrics_file}.{prefix.rsplit("/", 1)[-1]}'
 
     global app
     app = NDNApp(face)
     app.run_forever(after_start=prefix_insert_test(
-        prefix=args.prefix,
+        prefix=prefix,
         key_path=args.key_path,
         cert_path=args.cert_path,
         also_register=args.also_register,
-        duration=args.duration
+        duration=args.duration,
+        expiration=args.expiration,
+        stats_interval=args.stats_interval,
+        log_every=args.log_every,
+        freshness=args.freshness,
+        cache_size=args.cache_size,
+        metrics_file=metrics_file
     ))
 
 
-async def prefix_insert_test(prefix: str, key_path: str, cert_path: str, duration: int, also_register: bool = False):
-    insertion_signer = get_signer_from_ndnd_key(key_path, cert_path)
+async def report_stats(prefix: str, interval: float, metrics: MetricsRegistry,
+                       metrics_file: Optional[str] = None) -> None:
+    last = 0
+    while True:
+        await asyncio.sleep(interval)
+        total = stats['interests']
+        outcomes = metrics.counts_by('insertions_total', 'outcome')
+        print(f'{prefix}: {total - last} Interests in the last {interval:g}s '
+              f'({(total - last) / interval:.1f}/s), {total} total, {stats["replies"]} replied, '
+              f'{stats["cache_hits"]} from cache; insertions '
+              f'{", ".join(f"{outcome}: {n}" for outcome, n in sorted(outcomes.items())) or "none"}', flush=True)
+        if metrics_file:
+            write_metrics(metrics, metrics_file)
+        last = total
+
 
-    with open(cert_path, 'r') as file:
-        bar_cert_str = file.read()
+def write_metrics(metrics: MetricsRegistry, path: str) -> None:
+    # Replace the file atomically so a scraper never reads a partial file
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(metrics.to_prometheus())
+    os.replace(f'{path}.tmp', path)
 
-    cert_to_staple = parse_ndnd_cert(bar_cert_str)['cert_data']
 
-    await insert_prefix(app, prefix, NullSigner(), insertion_signer, cost=5, stapled_certs=[cert_to_staple])
+async def prefix_insert_test(prefix: str, key_path: str, cert_path: str, duration: int, also_register: bool = False,
+                             expiration: int = 24 * 3600_000, stats_interval: float = 10, log_every: int = 0,
+                             freshness: int = 0, cache_size: int = 10000, metrics_file: Optional[str] = None):
+    insertion_signer = get_signer_from_ndnd_key(key_path, cert_path)
+
+    cert_bundle = StapledCertBundle([read_ndnd_cert(cert_path)['cert_data']])
+    if not cert_bundle.is_valid():
+        print(f'Warning: {cert_path} is not valid now; every insertion will fail until it is reissued')
+
+    manager = PrefixInsertionManager(app, NullSigner(), insertion_signer, stapled_certs=cert_bundle)
+    manager.add(prefix, cost=5, expiration=expiration)
+    manager.start()
     if also_register:
         try:
             status = await app.register(prefix)
@@ -95,12 +205,19 @@ async def prefix_insert_test(prefix: str, key_path: str, cert_path: str, duratio
         except Exception as e:
             print(f"Error registering prefix {prefix}: {e}")
 
-    app.attach_handler(prefix, on_interest_handler_factory(prefix))
+    content_store = ContentStore(max_entries=cache_size) if cache_size > 0 and freshness > 0 else None
+    app.attach_handler(prefix, on_interest_handler_factory(prefix, log_every, freshness, content_store))
 
     print(f'Ready and listening for prefix: {prefix} for {duration} seconds.')
 
+    reporter = (asyncio.create_task(report_stats(prefix, stats_interval, manager.metrics, metrics_file))
+                if stats_interval > 0 else None)
     await asyncio.sleep(duration)
-    await insert_prefix(app, prefix, NullSigner(), insertion_signer, expiration=0, stapled_certs=[cert_to_staple])
+    if reporter is not None:
+        reporter.cancel()
+    await manager.shutdown()
+    if metrics_file:
+        write_metrics(manager.metrics, metrics_file)
     if also_register:
         try:
             status = await app.unregister(prefix)
@@ -113,12 +230,33 @@ async def prefix_insert_test(prefix: str, key_path: str, cert_path: str, duratio
         app.shutdown()
         print('App shutdown')
 
-def on_interest_handler_factory(registered_prefix: str):
+def on_interest_handler_factory(registered_prefix: str, log_every: int = 0, freshness: int = 0,
+                                content_store: Optional[ContentStore] = None):
+    content = f"Hello from {registered_prefix}!".encode()
+    if freshness <= 0:
+        # Data without a FreshnessPeriod never answers a MustBeFresh Interest, so caching it
+        # would only add a lookup and an insertion to every Interest
+        content_store = None
+
     def on_interest(name: FormalName, app_param: Optional[BinaryStr], reply: ReplyFunc, context: PktContext) -> None:
-        print(f"Received Interest for: {Name.to_str(name)} under prefix {registered_prefix}")
-        content = f"Hello from {registered_prefix}!".encode()
+        stats['interests'] += 1
+        if log_every and stats['interests'] % log_every == 0:
+            print(f"Received Interest for: {Name.to_str(name)} under prefix {registered_prefix}")
+        if content_store is not None:
+            key = Name.to_bytes(name)
+            wire = content_store.get(key, context['int_param'].must_be_fresh)
+            if wire is not None:
+                reply(wire)
+                stats['replies'] += 1
+                stats['cache_hits'] += 1
+                return
         if app:
-            reply(app.make_data(name, content=content, signer=NullSigner()))
+            wire = app.make_data(name, content=content, signer=NullSigner(),
+                                 freshness_period=freshness if freshness > 0 else None)
+            if content_store is not None:
+                content_store.put(key, wire, freshness)
+            reply(wire)
+            stats['replies'] += 1
         else:
             print("Error: App is not initialized, cannot send Data packet.")
     return on_interest
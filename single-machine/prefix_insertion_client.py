@@ -1,13 +1,19 @@
 from ndn.appv2 import NDNApp
-from ndn.encoding import Component, MetaInfo, Name, NonStrictName, Signer, TlvModel, BytesField, UintField, make_data
+from ndn.encoding import BinaryStr, Component, FormalName, MetaInfo, Name, NonStrictName, Signer, TlvModel, BytesField, UintField
+from ndn.encoding import SignatureInfo, TypeNumber, get_tl_num_size, write_tl_num
 from ndn.transport.nfd_registerer import NfdRegister
 from ndn.transport.prefix_registerer import PrefixRegisterer
 from ndn import utils, security, types
 from ndn.app_support import nfd_mgmt
+from ndn.app_support.security_v2 import parse_certificate
 import asyncio
 import random
 import time
-from typing import Union, Optional
+from datetime import datetime, timezone
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Union, Optional
+from insertion_metrics import MetricsRegistry
 
 
 class InsObjModel(TlvModel):
@@ -18,28 +24,239 @@ class StapledCertificateModel(TlvModel):
     cert = BytesField(0x216)
 
 
+class StapledCertBundle:
+    """
+    A certificate chain encoded once as StapledCertificate TLVs, ready to append to insertion objects.
+
+    The bundle also records the intersection of the certificates' validity periods, so an
+    expired chain can be rejected before anything is sent.
+    """
+
+    def __init__(self, certs: Iterable[BinaryStr]):
+        certs = [bytes(cert) for cert in certs]
+        wire = bytearray()
+        self.not_before = 0.0
+        self.not_after = float('inf')
+        for cert in certs:
+            cert_wrapper_model = StapledCertificateModel()
+            cert_wrapper_model.cert = cert
+            wire.extend(cert_wrapper_model.encode())
+
+            validity = parse_certificate(cert).signature_info.validity_period
+            if validity is not None:
+                self.not_before = max(self.not_before, _parse_validity_time(validity.not_before))
+                self.not_after = min(self.not_after, _parse_validity_time(validity.not_after))
+        self.certs = certs
+        self.wire = memoryview(bytes(wire))
+
+    def is_valid(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.not_before <= now <= self.not_after
+
+    def __len__(self) -> int:
+        return len(self.wire)
+
+
+def _parse_validity_time(value: BinaryStr) -> float:
+    return datetime.strptime(bytes(value).decode(), '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc).timestamp()
+
+
+def _as_cert_bundle(stapled_certs: Union[list[bytes], StapledCertBundle, None]) -> Optional[StapledCertBundle]:
+    if stapled_certs is None or isinstance(stapled_certs, StapledCertBundle):
+        return stapled_certs
+    return StapledCertBundle(stapled_certs)
+
+
+class InsertionResult:
+    """
+    Outcome of one insertion (or withdrawal). True in a boolean context if the forwarder
+    answered with status 200.
+
+    ``status_code``/``status_text`` come from the ControlResponse and are None/'' if no reply
+    arrived; ``error`` then names what happened instead (InterestTimeout, InterestNack, ...).
+    ``rtt`` is the round-trip time of the answered Interest in seconds, ``retries`` the number
+    of Interests re-sent before it, and ``size`` the length of the ApplicationParameters.
+    """
+    __slots__ = ('name', 'status_code', 'status_text', 'error', 'rtt', 'retries', 'size')
+
+    def __init__(self, name: FormalName, status_code: Optional[int] = None, status_text: str = '',
+                 error: Optional[str] = None, rtt: Optional[float] = None, retries: int = 0, size: int = 0):
+        self.name = name
+        self.status_code = status_code
+        self.status_text = status_text
+        self.error = error
+        self.rtt = rtt
+        self.retries = retries
+        self.size = size
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+    @property
+    def outcome(self) -> str:
+        """
+        'ok', 'rejected' for any other status code, or the error name
+        """
+        if self.status_code is not None:
+            return 'ok' if self.ok else 'rejected'
+        return self.error or 'unknown'
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __str__(self) -> str:
+        if self.status_code is not None:
+            return (f'Insertion for {Name.to_str(self.name)} {"succeeded" if self.ok else "failed"}: '
+                    f'{self.status_code} {self.status_text}')
+        return f'Insertion for {Name.to_str(self.name)} failed: {self.error}' + \
+            (f' ({self.status_text})' if self.status_text else '')
+
+    def __repr__(self) -> str:
+        return f'<InsertionResult {Name.to_str(self.name)} {self.outcome} {self.status_code}>'
+
+    def to_dict(self) -> dict:
+        return {'prefix': Name.to_str(self.name), 'ok': self.ok, 'outcome': self.outcome,
+                'status_code': self.status_code, 'status_text': self.status_text,
+                'rtt_ms': self.rtt * 1000 if self.rtt is not None else None,
+                'retries': self.retries, 'size': self.size}
+
+
+class InsertionObjectCache:
+    """
+    Cache of encoded insertion object parts, so building an object only encodes its Name and signs.
+
+    Per (prefix, cost, expiration) it keeps the value of the ``<prefix>/32=PA`` name and the
+    MetaInfo and Content TLVs; per signer, the SignatureInfo TLV. An object is then the Name
+    TLV with the version and segment appended, the cached TLVs and the SignatureValue.
+    The signature covers the version, so every new version is still signed once.
+
+    Prefixes given as strings are looked up as is, without normalizing them first.
+    """
+
+    def __init__(self, max_entries: int = 100_000):
+        self.max_entries = max_entries
+        # (prefix, cost, expiration) -> (name value without version and segment, MetaInfo and Content TLVs)
+        self._templates: OrderedDict[tuple, tuple[bytes, bytes]] = OrderedDict()
+        # signer -> (SignatureInfo TLV, maximum SignatureValue size)
+        self._signature_infos: dict[Signer, tuple[bytes, int]] = {}
+
+    def _template(self, name: NonStrictName, expiration: int, cost: int) -> tuple[bytes, bytes]:
+        key = (name if isinstance(name, str) else bytes(Name.to_bytes(name)), cost, expiration)
+        template = self._templates.get(key)
+        if template is not None:
+            self._templates.move_to_end(key)
+            return template
+
+        ins_obj_model = InsObjModel()
+        ins_obj_model.expiration = expiration
+        ins_obj_model.cost = cost
+        name_value = b''.join(bytes(component) for component in Name.normalize(name))
+        template = (name_value + bytes(Component.from_str('32=PA')),
+                    _tlv(TypeNumber.META_INFO, MetaInfo(content_type=5).encode()) +
+                    _tlv(TypeNumber.CONTENT, ins_obj_model.encode()))
+
+        self._templates[key] = template
+        if len(self._templates) > self.max_entries:
+            self._templates.popitem(last=False)
+        return template
+
+    def _signature_info(self, ins_signer: Signer) -> tuple[bytes, int]:
+        signature_info = self._signature_infos.get(ins_signer)
+        if signature_info is None:
+            model = SignatureInfo()
+            ins_signer.write_signature_info(model)
+            signature_info = self._signature_infos[ins_signer] = (
+                _tlv(TypeNumber.SIGNATURE_INFO, model.encode()), ins_signer.get_signature_value_size())
+        return signature_info
+
+    def make(self, name: NonStrictName, ins_signer: Signer, expiration: int, cost: int,
+             version: int) -> bytes:
+        name_value, meta_content = self._template(name, expiration, cost)
+        signature_info, signature_size = self._signature_info(ins_signer)
+        name_value = b''.join((name_value, Component.from_version(version), Component.from_segment(0)))
+        covered = b''.join((_tlv(TypeNumber.NAME, name_value), meta_content, signature_info))
+        signature = bytearray(signature_size)
+        signature_size = ins_signer.write_signature_value(signature, [covered])
+        return _tlv(TypeNumber.DATA, b''.join((covered, _tlv(TypeNumber.SIGNATURE_VALUE,
+                                                                signature[:signature_size]))))
+
+
+def _tlv(typ: int, value: BinaryStr) -> bytes:
+    header = bytearray(get_tl_num_size(typ) + get_tl_num_size(len(value)))
+    write_tl_num(len(value), header, write_tl_num(typ, header))
+    return b''.join((header, value))
+
+
+_insertion_object_cache = InsertionObjectCache()
+
+
 def create_insertion_object(name: NonStrictName, ins_signer: Signer,
-                            expiration: int = 24 * 3600_000, cost: int = 0) -> Union[bytearray, memoryview]:
-    name = Name.normalize(name)
+                            expiration: int = 24 * 3600_000, cost: int = 0,
+                            version: Optional[int] = None) -> bytes:
+    time_millis = int(time.time() * 1000) if version is None else version
+    return _insertion_object_cache.make(name, ins_signer, expiration, cost, time_millis)
+
+
+_worker_signer: Optional[Signer] = None
+
 
-    time_millis = int(time.time() * 1000)
-    ins_obj_name = name + [Component.from_str('32=PA'), Component.from_version(time_millis), Component.from_segment(0)]
+def _init_signing_worker(key_locator_name: bytes, key_der: bytes) -> None:
+    global _worker_signer
+    _worker_signer = security.Sha256WithEcdsaSigner(Name.from_bytes(key_locator_name), key_der)
 
-    ins_obj_model = InsObjModel()
-    ins_obj_model.expiration = expiration
-    ins_obj_model.cost = cost
 
-    ins_obj = make_data(ins_obj_name,
-                        MetaInfo(content_type=5),
-                        ins_obj_model.encode(),
-                        ins_signer)
+def _sign_in_worker(items: list[tuple[bytes, int, int, int]]) -> list[bytes]:
+    return [bytes(create_insertion_object(Name.from_bytes(name), _worker_signer, expiration, cost, version))
+            for name, expiration, cost, version in items]
 
-    return ins_obj
+
+class InsertionSigningPool:
+    """
+    Signs insertion objects for an ECDSA signer in worker processes.
+
+    Meant for cold batches (e.g. startup) where thousands of objects need signing at once.
+    Use as a context manager, or call shutdown() when done.
+    """
+
+    def __init__(self, ins_signer: security.Sha256WithEcdsaSigner, max_workers: Optional[int] = None,
+                 chunk_size: int = 64):
+        if not isinstance(ins_signer, security.Sha256WithEcdsaSigner):
+            raise TypeError('InsertionSigningPool only supports Sha256WithEcdsaSigner')
+        self.ins_signer = ins_signer
+        self.chunk_size = chunk_size
+        self.executor = ProcessPoolExecutor(
+            max_workers,
+            initializer=_init_signing_worker,
+            initargs=(bytes(Name.to_bytes(ins_signer.key_locator_name)), bytes(ins_signer.key_der)))
+
+    async def sign(self, items: list[tuple[NonStrictName, int, int, int]]) -> list[bytes]:
+        """
+        Sign ``(name, expiration, cost, version)`` items, returning encoded objects in the same order.
+        """
+        encoded = [(bytes(Name.to_bytes(name)), expiration, cost, version)
+                   for name, expiration, cost, version in items]
+        chunks = [encoded[i:i + self.chunk_size] for i in range(0, len(encoded), self.chunk_size)]
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, _sign_in_worker, chunk)
+                                         for chunk in chunks))
+        return [ins_obj for chunk in results for ins_obj in chunk]
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> 'InsertionSigningPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
 
 
 async def insert_prefix(app: NDNApp, name: NonStrictName, interest_signer: Signer, ins_signer: Signer,
                         expiration: int = 24 * 3600_000, cost: int = 0,
-                        stapled_certs: Optional[list[bytes]] = None) -> bool:
+                        stapled_certs: Union[list[bytes], StapledCertBundle, None] = None,
+                        validator=None, retries: int = 0,
+                        metrics: Optional[MetricsRegistry] = None) -> InsertionResult:
     """
     Insert a prefix (unofficial method written as an extension to python-ndn)
 
@@ -47,51 +264,169 @@ async def insert_prefix(app: NDNApp, name: NonStrictName, interest_signer: Signe
 
     Expiration should be in milliseconds(?)
 
+    The insertion object version comes from next_command_timestamp, so concurrent calls never
+    collide and no sleeping or locking is needed.
+
+    ``stapled_certs`` may be a StapledCertBundle, which avoids re-encoding the certificates on
+    every call; insertions with an expired bundle fail without being sent.
+
+    With a ``validator`` (an lvs_validator.InsertionValidator), an insertion the schema would
+    reject raises ValueError without being sent.
+
+    Returns an InsertionResult. An Interest that times out or is Nacked is re-sent up to
+    ``retries`` times, after a short exponential backoff. Each retry carries a newly signed insertion object with a fresh command
+    timestamp as its version: the lost Interest may have reached the forwarder, which then
+    rejects the same version again as a replay. If ``metrics`` is given, the result is
+    recorded there.
+
     See (todo)
     """
+    name = Name.normalize(name)
+    registerer_base: PrefixRegisterer = app.registerer
+    if not isinstance(registerer_base, NfdRegister):
+        raise TypeError('The prefix registerer associated with the app is not an NFD Registerer')
 
-    # the official way to fix any and all race conditions
-    await asyncio.sleep(random.random())
+    registerer: NfdRegister = registerer_base
+    cert_bundle = _as_cert_bundle(stapled_certs)
+    if validator is not None and not validator.check_insertion(name, ins_signer.key_locator_name, cert_bundle):
+        raise ValueError(f'Insertion rejected by the schema for {Name.to_str(name)}')
 
-    name = Name.normalize(name)
+    def renew() -> bytes:
+        return create_insertion_object(name, ins_signer, expiration, cost, next_command_timestamp(registerer))
+
+    result = await _express_insertion(app, name, interest_signer, renew(), cert_bundle, retries, renew)
+    if metrics is not None:
+        metrics.record_insertion(result)
+    return result
+
+
+async def insert_prefixes(app: NDNApp, prefixes: Iterable[tuple[NonStrictName, int, int]],
+                          interest_signer: Signer, ins_signer: Signer,
+                          stapled_certs: Union[list[bytes], StapledCertBundle, None] = None,
+                          window: int = 64,
+                          signing_pool: Optional[InsertionSigningPool] = None,
+                          validator=None, retries: int = 0,
+                          metrics: Optional[MetricsRegistry] = None) -> list[InsertionResult]:
+    """
+    Insert many prefixes at once, keeping up to ``window`` insertion Interests in flight.
+
+    ``prefixes`` is a sequence of ``(name, cost, expiration)`` tuples. Returns one InsertionResult
+    per prefix, in the same order as the input; ``retries`` and ``metrics`` are as in insert_prefix.
+
+    Like insert_prefix, each insertion object gets its own command timestamp as its version.
+    If ``signing_pool`` is given, all objects are signed in parallel by the pool before sending;
+    the pool must have been created for ``ins_signer``. Objects for retries are signed in this
+    process.
+
+    If ``validator`` (an lvs_validator.InsertionValidator) is given, the whole batch is checked
+    against the schema first and a ValueError lists the rejected prefixes; nothing is sent then.
+    """
     registerer_base: PrefixRegisterer = app.registerer
     if not isinstance(registerer_base, NfdRegister):
         raise TypeError('The prefix registerer associated with the app is not an NFD Registerer')
 
     registerer: NfdRegister = registerer_base
+    if window < 1:
+        raise ValueError('window must be at least 1')
+    in_flight = asyncio.Semaphore(window)
+    cert_bundle = _as_cert_bundle(stapled_certs)
 
-    async def pass_all(_name, _sig, _context):
-        return types.ValidResult.PASS
+    prefixes = list(prefixes)
+    if validator is not None:
+        invalid = validator.invalid_prefixes([name for name, _, _ in prefixes], ins_signer.key_locator_name,
+                                             cert_bundle)
+        if invalid:
+            raise ValueError(f'Insertion rejected by the schema for {len(invalid)} prefixes: '
+                             f'{", ".join(Name.to_str(name) for name in invalid[:10])}')
+
+    items = [(Name.normalize(name), expiration, cost, next_command_timestamp(registerer))
+             for name, cost, expiration in prefixes]
+    if signing_pool is not None:
+        ins_objs = await signing_pool.sign(items)
+    else:
+        ins_objs = [None] * len(items)
+
+    async def insert_one(name: FormalName, expiration: int, cost: int, version: int,
+                         ins_obj: Optional[bytes]) -> InsertionResult:
+        async with in_flight:
+            if ins_obj is None:
+                ins_obj = create_insertion_object(name, ins_signer, expiration, cost, version)
+            result = await _express_insertion(
+                app, name, interest_signer, ins_obj, cert_bundle, retries,
+                lambda: create_insertion_object(name, ins_signer, expiration, cost,
+                                                next_command_timestamp(registerer)))
+        if metrics is not None:
+            metrics.record_insertion(result)
+        return result
+
+    return await asyncio.gather(*(insert_one(*item, ins_obj) for item, ins_obj in zip(items, ins_objs)))
+
+
+def next_command_timestamp(registerer: NfdRegister) -> int:
+    """
+    Allocate a unique, strictly increasing command timestamp in milliseconds.
+
+    The clock is the registerer's ``_last_command_timestamp``, so it is shared with prefix
+    registration. If several timestamps are allocated within the same millisecond, the clock
+    runs ahead of wall time instead of waiting for it.
+    """
+    # Read and update happen without yielding to the event loop, so concurrent
+    # callers always get distinct timestamps.
+    timestamp = max(utils.timestamp(), registerer._last_command_timestamp + 1)
+    registerer._last_command_timestamp = timestamp
+    return timestamp
+
+
+async def _pass_all(_name, _sig, _context):
+    return types.ValidResult.PASS
+
+
+# Delay before the first retry of an insertion Interest in seconds, doubled for every further retry
+RETRY_BACKOFF = 0.05
 
-    async with registerer._prefix_register_semaphore:
-        for _ in range(10):
-            now = utils.timestamp()
-            if now > registerer._last_command_timestamp:
-                registerer._last_command_timestamp = now
-                break
-            await asyncio.sleep(0.001)
-        try:
-            ins_obj = bytearray(create_insertion_object(name, ins_signer, expiration, cost))
 
-            if stapled_certs:
-                for cert in stapled_certs:
-                    cert_wrapper_model = StapledCertificateModel()
-                    cert_wrapper_model.cert = cert
-                    cert_wrapper = bytearray(cert_wrapper_model.encode())
-                    ins_obj.extend(cert_wrapper)
+def _retry_delay(attempt: int) -> float:
+    return RETRY_BACKOFF * 2 ** (attempt - 1) * (0.5 + random.random() / 2)
 
+
+async def _express_insertion(app: NDNApp, name: FormalName, interest_signer: Signer,
+                             ins_obj: Union[bytes, bytearray, memoryview],
+                             cert_bundle: Optional[StapledCertBundle], retries: int = 0,
+                             renew: Optional[Callable[[], Union[bytes, bytearray, memoryview]]] = None
+                             ) -> InsertionResult:
+    """
+    Send ``ins_obj`` to /routing/insert. Retries wait an exponential backoff, then ``renew`` is called
+    for a new insertion object with a newer version; without it the same object is re-sent and may be
+    rejected as a replay.
+    """
+    if cert_bundle is not None and not cert_bundle.is_valid():
+        return InsertionResult(name, error='InvalidCertificate',
+                               status_text='stapled certificate chain is not valid now')
+
+    attempt = 0
+    while True:
+        if attempt > 0 and renew is not None:
+            ins_obj = renew()
+        if cert_bundle:
+            app_param = b''.join((ins_obj, cert_bundle.wire))
+        else:
+            app_param = ins_obj
+        start = time.perf_counter()
+        try:
             _, reply, _ = await app.express(
                 name='/routing/insert',
-                app_param=ins_obj, signer=interest_signer,
-                validator=pass_all,
+                app_param=app_param, signer=interest_signer,
+                validator=_pass_all,
                 lifetime=1000)
-            ret = nfd_mgmt.parse_response(reply)
-            if ret['status_code'] != 200:
-                print(f'Insertion for {Name.to_str(name)} failed: {ret["status_code"]} {ret["status_text"]}', flush=True)
-                return False
-            else:
-                print(f'Insertion for {Name.to_str(name)} succeeded: {ret["status_code"]} {ret["status_text"]}', flush=True)
-                return True
-        except (types.InterestNack, types.InterestTimeout, types.InterestCanceled, types.ValidationFailure) as e:
-            print(f'Insertion for {Name.to_str(name)} failed: {e.__class__.__name__}', flush=True)
-            return False
+        except (types.InterestNack, types.InterestTimeout) as e:
+            if attempt < retries:
+                attempt += 1
+                await asyncio.sleep(_retry_delay(attempt))
+                continue
+            return InsertionResult(name, error=e.__class__.__name__, retries=attempt, size=len(app_param))
+        except (types.InterestCanceled, types.ValidationFailure) as e:
+            return InsertionResult(name, error=e.__class__.__name__, retries=attempt, size=len(app_param))
+        rtt = time.perf_counter() - start
+        ret = nfd_mgmt.parse_response(reply)
+        return InsertionResult(name, ret['status_code'], ret['status_text'], rtt=rtt, retries=attempt,
+                               size=len(app_param))
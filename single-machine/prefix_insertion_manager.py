@@ -0,0 +1,234 @@
+import asyncio
+import random
+from typing import Hashable, Optional, Union
+from ndn.appv2 import NDNApp
+from ndn.encoding import FormalName, Name, NonStrictName, Signer
+from insertion_metrics import MetricsRegistry
+from prefix_insertion_client import InsertionResult, InsertionSigningPool, StapledCertBundle, insert_prefixes
+
+
+class TimingWheel:
+    """
+    Hashed timing wheel with ``n_slots`` slots of ``tick`` seconds each.
+
+    Scheduling and cancelling are O(1); advancing one tick only touches a single slot.
+    Delays longer than one rotation are kept in their slot with a remaining round count.
+    """
+
+    def __init__(self, tick: float = 1.0, n_slots: int = 512):
+        self.tick = tick
+        self.n_slots = n_slots
+        self.current = 0
+        self._slots: list[dict[Hashable, int]] = [{} for _ in range(n_slots)]
+        self._where: dict[Hashable, int] = {}
+
+    def schedule(self, key: Hashable, delay: float) -> None:
+        """
+        Schedule ``key`` to become due after ``delay`` seconds, replacing any earlier schedule.
+        """
+        self.cancel(key)
+        ticks = max(1, round(delay / self.tick))
+        rounds, offset = divmod(ticks, self.n_slots)
+        if offset == 0:
+            rounds, offset = rounds - 1, self.n_slots
+        slot = (self.current + offset) % self.n_slots
+        self._slots[slot][key] = rounds
+        self._where[key] = slot
+
+    def cancel(self, key: Hashable) -> None:
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self) -> list[Hashable]:
+        """
+        Move the wheel forward one tick and return the keys that became due.
+        """
+        self.current = (self.current + 1) % self.n_slots
+        slot = self._slots[self.current]
+        due = [key for key, rounds in slot.items() if rounds == 0]
+        for key in due:
+            del slot[key]
+            del self._where[key]
+        for key in slot:
+            slot[key] -= 1
+        return due
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+
+class _ManagedPrefix:
+    def __init__(self, name: FormalName, cost: int, expiration: int):
+        self.name = name
+        self.cost = cost
+        self.expiration = expiration
+        self.failures = 0
+
+
+class PrefixInsertionManager:
+    """
+    Keeps a set of prefixes inserted by refreshing each one before it expires.
+
+    Each prefix is refreshed after ``refresh_fraction`` of its expiration, minus up to ``jitter``
+    of that interval at random, so refreshes of many prefixes spread over the timing wheel.
+    Failed insertions are retried with exponential backoff. On shutdown all prefixes are
+    withdrawn in one batch. Every result is recorded in ``metrics``.
+    """
+
+    def __init__(self, app: NDNApp, interest_signer: Signer, ins_signer: Signer,
+                 stapled_certs: Union[list[bytes], StapledCertBundle, None] = None,
+                 refresh_fraction: float = 0.5, jitter: float = 0.1,
+                 tick: float = 1.0, n_slots: int = 512, window: int = 64,
+                 retry_base: float = 1.0, retry_max: float = 60.0,
+                 signing_pool: Optional[InsertionSigningPool] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        if not 0 < refresh_fraction < 1:
+            raise ValueError('refresh_fraction must be between 0 and 1')
+        self.app = app
+        self.interest_signer = interest_signer
+        self.ins_signer = ins_signer
+        if stapled_certs is not None and not isinstance(stapled_certs, StapledCertBundle):
+            stapled_certs = StapledCertBundle(stapled_certs)
+        self.stapled_certs = stapled_certs
+        self.refresh_fraction = refresh_fraction
+        self.jitter = jitter
+        self.window = window
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.signing_pool = signing_pool
+        self.metrics = metrics if metrics is not None else MetricsRegistry()
+
+        self.wheel = TimingWheel(tick, n_slots)
+        self._prefixes: dict[bytes, _ManagedPrefix] = {}
+        self._pending_withdrawals: dict[bytes, _ManagedPrefix] = {}
+        self._batches: set[asyncio.Task] = set()
+        self._running: Optional[asyncio.Task] = None
+
+    def add(self, name: NonStrictName, cost: int = 0, expiration: int = 24 * 3600_000) -> None:
+        """
+        Start managing a prefix. It is inserted on the next tick and refreshed from then on.
+        Adding a prefix that is already managed updates its cost and expiration.
+        """
+        name = Name.normalize(name)
+        key = Name.to_bytes(name)
+        self._pending_withdrawals.pop(key, None)
+        self._prefixes[key] = _ManagedPrefix(name, cost, expiration)
+        self.wheel.schedule(key, 0)
+
+    def remove(self, name: NonStrictName) -> None:
+        """
+        Stop managing a prefix and withdraw it on the next tick.
+        """
+        key = Name.to_bytes(Name.normalize(name))
+        prefix = self._prefixes.pop(key, None)
+        if prefix is not None:
+            self._pending_withdrawals[key] = prefix
+            self.wheel.schedule(key, 0)
+
+    def __len__(self) -> int:
+        return len(self._prefixes)
+
+    def start(self) -> asyncio.Task:
+        if self._running is None:
+            self._running = asyncio.create_task(self._run())
+        return self._running
+
+    async def shutdown(self) -> list[InsertionResult]:
+        """
+        Stop refreshing, wait for in-flight batches, and withdraw every prefix in one batch.
+        """
+        if self._running is not None:
+            self._running.cancel()
+            try:
+                await self._running
+            except asyncio.CancelledError:
+                pass
+            self._running = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+        withdrawals = list(self._prefixes.values()) + list(self._pending_withdrawals.values())
+        self._prefixes.clear()
+        self._pending_withdrawals.clear()
+        if not withdrawals:
+            return []
+        return await insert_prefixes(self.app, [(prefix.name, prefix.cost, 0) for prefix in withdrawals],
+                                     self.interest_signer, self.ins_signer,
+                                     stapled_certs=self.stapled_certs, window=self.window,
+                                     metrics=self.metrics)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            next_tick += self.wheel.tick
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            due = self.wheel.advance()
+            if due:
+                batch = asyncio.create_task(self._process(due))
+                self._batches.add(batch)
+                batch.add_done_callback(self._batches.discard)
+
+    async def _process(self, due: list[bytes]) -> None:
+        inserts = [self._prefixes[key] for key in due if key in self._prefixes]
+        withdrawals = [self._pending_withdrawals.pop(key) for key in due if key in self._pending_withdrawals]
+
+        requests = ([(prefix.name, prefix.cost, prefix.expiration) for prefix in inserts] +
+                    [(prefix.name, prefix.cost, 0) for prefix in withdrawals])
+        try:
+            results = await insert_prefixes(self.app, requests, self.interest_signer, self.ins_signer,
+                                            stapled_certs=self.stapled_certs, window=self.window,
+                                            signing_pool=self.signing_pool, metrics=self.metrics)
+        except Exception as e:
+            # This runs as a detached task, so an exception would otherwise be lost along with
+            # the schedule of every prefix in the batch
+            print(f'Insertion batch of {len(requests)} prefixes failed: {e.__class__.__name__}: {e}')
+            self._retry_batch(inserts, withdrawals)
+            return
+
+        for prefix, result in zip(inserts, results):
+            key = Name.to_bytes(prefix.name)
+            if self._prefixes.get(key) is not prefix:
+                # Removed or re-added while the batch was in flight
+                continue
+            if result.ok:
+                prefix.failures = 0
+                self.wheel.schedule(key, self._refresh_delay(prefix))
+            else:
+                print(result)
+                prefix.failures += 1
+                self.wheel.schedule(key, self._retry_delay(prefix))
+
+        for prefix, result in zip(withdrawals, results[len(inserts):]):
+            key = Name.to_bytes(prefix.name)
+            if not result.ok and key not in self._prefixes and key not in self._pending_withdrawals:
+                prefix.failures += 1
+                self._pending_withdrawals[key] = prefix
+                self.wheel.schedule(key, self._retry_delay(prefix))
+
+    def _retry_batch(self, inserts: list[_ManagedPrefix], withdrawals: list[_ManagedPrefix]) -> None:
+        for prefix in inserts:
+            key = Name.to_bytes(prefix.name)
+            if self._prefixes.get(key) is prefix:
+                prefix.failures += 1
+                self.wheel.schedule(key, self._retry_delay(prefix))
+        for prefix in withdrawals:
+            key = Name.to_bytes(prefix.name)
+            if key not in self._prefixes and key not in self._pending_withdrawals:
+                prefix.failures += 1
+                self._pending_withdrawals[key] = prefix
+                self.wheel.schedule(key, self._retry_delay(prefix))
+
+    def _refresh_delay(self, prefix: _ManagedPrefix) -> float:
+        interval = prefix.expiration / 1000 * self.refresh_fraction
+        return interval * (1 - self.jitter * random.random())
+
+    def _retry_delay(self, prefix: _ManagedPrefix) -> float:
+        backoff = min(self.retry_max, self.retry_base * 2 ** (prefix.failures - 1))
+        # Never back off past the point where the prefix would have expired
+        backoff = min(backoff, max(self.wheel.tick, prefix.expiration / 1000 * (1 - self.refresh_fraction)))
+        return backoff * (0.5 + random.random() / 2)
@@ -0,0 +1,56 @@
+import os
+import sys
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.dirname(HERE)
+SIMULATOR_DIR = os.path.join(APP_DIR, '..', 'simulator')
+# The modules are flat scripts run from their own directories; keygen lives with the simulator
+sys.path[:0] = [APP_DIR, SIMULATOR_DIR]
+
+from keygen import NdndKey  # noqa: E402
+from cert_util import get_signer_from_ndnd_key, read_ndnd_cert  # noqa: E402
+from prefix_insertion_client import StapledCertBundle  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def keys(tmp_path_factory):
+    """
+    A root -> n1 insert key -> n1 client key chain issued as keygen.prepare_keys does, with
+    the client signer and its stapled bundle. Also an n2 client certificate wrongly issued by
+    n1's insert key, and a self-signed key of the n1 client identity outside the chain.
+    """
+    tmp = tmp_path_factory.mktemp('keys')
+    root = NdndKey.generate('/minindn')
+    insert_key = NdndKey.generate('/minindn/n1/insert')
+    client_key = NdndKey.generate('/minindn/n1/insert/client')
+    other_client_key = NdndKey.generate('/minindn/n2/insert/client')
+    rogue_key = NdndKey.generate('/minindn/n1/insert/client')
+    files = {
+        'root.cert': root.sign_cert(root),
+        'insert.cert': root.sign_cert(insert_key),
+        'client.key': client_key.to_pem(),
+        'client.cert': insert_key.sign_cert(client_key),
+        'other-client.cert': insert_key.sign_cert(other_client_key),
+        'rogue.key': rogue_key.to_pem(),
+        'rogue.cert': rogue_key.sign_cert(rogue_key),
+    }
+    for file_name, text in files.items():
+        (tmp / file_name).write_text(text)
+    certs = {file_name[:-len('.cert')]: read_ndnd_cert(str(tmp / file_name))['cert_data']
+             for file_name in files if file_name.endswith('.cert')}
+    return {
+        'certs': certs,
+        'anchor': certs['root'],
+        'bundle': StapledCertBundle([certs['client'], certs['insert']]),
+        'signer': get_signer_from_ndnd_key(str(tmp / 'client.key'), str(tmp / 'client.cert')),
+        'rogue': get_signer_from_ndnd_key(str(tmp / 'rogue.key'), str(tmp / 'rogue.cert')),
+    }
+
+
+try:
+    import pytest_benchmark  # noqa: F401
+except ImportError:
+    @pytest.fixture
+    def benchmark():
+        pytest.skip('pytest-benchmark is not installed')
@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from ndn.encoding import Component, MetaInfo, Name, make_data, parse_data
+from ndn.security import DigestSha256Signer, NullSigner
+from insert_responder import InsertResponder, run_with_responder, split_insertion
+from insertion_metrics import MetricsRegistry
+from lvs_validator import InsertionValidator
+from prefix_insertion_client import (InsObjModel, InsertionObjectCache, create_insertion_object, insert_prefix,
+                                     insert_prefixes)
+from conftest import SIMULATOR_DIR
+
+
+class RecordingResponder(InsertResponder):
+    """
+    Also keeps the name of every insertion object received, in arrival order, including dropped ones
+    """
+    def __init__(self, app, **kwargs):
+        super().__init__(app, **kwargs)
+        self.objects = []
+
+    def on_interest(self, name, app_param, reply, context):
+        self.objects.append(parse_data(split_insertion(app_param)[0])[0])
+        super().on_interest(name, app_param, reply, context)
+
+
+def run(after_start, **responder_args):
+    return asyncio.run(run_with_responder(after_start, lambda app: RecordingResponder(app, **responder_args)))
+
+
+def test_status_codes(keys):
+    async def insert(app):
+        return await insert_prefix(app, '/minindn/n1/a', NullSigner(), keys['signer'])
+
+    result, responder = run(insert)
+    assert result.ok and result.status_code == 200 and result.outcome == 'ok'
+    assert result.rtt is not None and result.size > 0
+    assert responder.statuses == {200: 1}
+
+    result, _ = run(insert, status_code=404, status_text='Not found')
+    assert not result and result.status_code == 404 and result.outcome == 'rejected'
+
+
+def test_batch_versions_follow_input_order(keys):
+    prefixes = [(f'/minindn/n1/{i}', 1, 60_000) for i in range(50)]
+
+    async def insert(app):
+        results = await insert_prefixes(app, prefixes, NullSigner(), keys['signer'], window=8)
+        results.append(await insert_prefix(app, '/minindn/n1/last', NullSigner(), keys['signer']))
+        return results
+
+    results, responder = run(insert)
+    assert all(results)
+    versions = {Name.to_str(name[:-3]): Component.to_number(name[-2]) for name in responder.objects}
+    ordered = [versions[name] for name, _, _ in prefixes] + [versions['/minindn/n1/last']]
+    assert ordered == sorted(set(ordered))
+
+
+def test_template_cache_reuse(keys):
+    cache = InsertionObjectCache()
+    first = cache.make('/minindn/n1/a', keys['signer'], 1000, 5, version=1)
+    second = cache.make('/minindn/n1/a', keys['signer'], 1000, 5, version=2)
+    assert len(cache._templates) == 1
+    # Same content, and the name only differs in the version
+    first_name, _, first_content, _ = parse_data(first)
+    second_name, _, second_content, _ = parse_data(second)
+    assert bytes(first_content) == bytes(second_content)
+    assert first_name[:-2] == second_name[:-2] and first_name[-2] != second_name[-2]
+
+    cache.make('/minindn/n1/a', keys['signer'], 1000, 6, version=3)
+    assert len(cache._templates) == 2 and len(cache._signature_infos) == 1
+
+
+def test_cached_object_matches_make_data():
+    ins_obj_model = InsObjModel()
+    ins_obj_model.expiration = 1000
+    ins_obj_model.cost = 5
+    expected = make_data(Name.from_str('/minindn/n1/a/32=PA') + [Component.from_version(7), Component.from_segment(0)],
+                         MetaInfo(content_type=5), ins_obj_model.encode(), DigestSha256Signer())
+    assert create_insertion_object('/minindn/n1/a', DigestSha256Signer(), 1000, 5, version=7) == bytes(expected)
+
+
+def test_responder_verifies_signatures_and_schema(keys):
+    validator = InsertionValidator.from_file(f'{SIMULATOR_DIR}/insert.tlv')
+
+    async def insert(app):
+        return [await insert_prefix(app, '/minindn/n1/a', NullSigner(), keys['signer'], stapled_certs=keys['bundle']),
+                await insert_prefix(app, '/minindn/n2/a', NullSigner(), keys['signer'], stapled_certs=keys['bundle']),
+                await insert_prefix(app, '/minindn/n1/b', NullSigner(), keys['rogue'], stapled_certs=keys['bundle']),
+                await insert_prefix(app, '/minindn/n1/c', NullSigner(), keys['signer'])]
+
+    results, responder = run(insert, trust_anchors=[keys['anchor']], validator=validator)
+    assert [result.status_code for result in results] == [200, 403, 403, 403]
+    assert responder.statuses == {200: 1, 403: 3}
+
+
+def test_client_validator_refuses_before_sending(keys):
+    validator = InsertionValidator.from_file(f'{SIMULATOR_DIR}/insert.tlv', trust_anchors=[keys['anchor']])
+
+    async def insert(app):
+        await insert_prefixes(app, [('/minindn/n1/a', 1, 1000), ('/minindn/n2/a', 1, 1000)], NullSigner(),
+                              keys['signer'], stapled_certs=keys['bundle'], validator=validator)
+
+    with pytest.raises(ValueError, match='/minindn/n2/a'):
+        run(insert)
+
+    async def insert_valid(app):
+        return await insert_prefix(app, '/minindn/n1/a', NullSigner(), keys['signer'],
+                                   stapled_certs=keys['bundle'], validator=validator)
+
+    result, _ = run(insert_valid)
+    assert result.ok
+
+
+def test_fault_injection(keys):
+    prefixes = [(f'/minindn/n1/{i}', 1, 60_000) for i in range(200)]
+    metrics = MetricsRegistry()
+
+    async def insert(app):
+        return await insert_prefixes(app, prefixes, NullSigner(), keys['signer'], metrics=metrics)
+
+    results, responder = run(insert, loss=0.1, error_rate=0.2, error_code=503, seed=7)
+    outcomes = metrics.counts_by('insertions_total', 'outcome')
+    assert responder.n_dropped == outcomes['InterestTimeout'] > 0
+    assert responder.statuses[503] == outcomes['rejected'] > 0
+    assert responder.statuses[200] == outcomes['ok'] == sum(result.ok for result in results)
+    assert sum(outcomes.values()) == len(prefixes)
+
+
+def test_retries_recover_from_loss(keys):
+    async def insert(app):
+        return await insert_prefixes(app, [(f'/minindn/n1/{i}', 1, 60_000) for i in range(20)], NullSigner(),
+                                     keys['signer'], retries=5)
+
+    results, responder = run(insert, loss=0.2, seed=2)
+    assert all(results)
+    assert sum(result.retries for result in results) == responder.n_dropped > 0
+    # Every retry is a new object with a newer version, so the forwarder cannot take it for a replay
+    versions = {}
+    for name in responder.objects:
+        versions.setdefault(Name.to_str(name[:-3]), []).append(Component.to_number(name[-2]))
+    assert any(len(sent) > 1 for sent in versions.values())
+    assert all(sent == sorted(set(sent)) for sent in versions.values())
+
+
+def test_bench_create_insertion_object(benchmark, keys):
+    versions = iter(range(10 ** 9))
+    benchmark(lambda: create_insertion_object('/minindn/n1/a', keys['signer'], cost=5, version=next(versions)))
+
+
+def test_bench_insert_prefix(benchmark, keys):
+    async def insert(app):
+        return await insert_prefix(app, '/minindn/n1/a', NullSigner(), keys['signer'], stapled_certs=keys['bundle'])
+
+    result, _ = benchmark(run, insert)
+    assert result.ok
+
+
+def test_bench_insert_prefixes(benchmark, keys):
+    prefixes = [(f'/minindn/n1/{i}', 1, 60_000) for i in range(100)]
+
+    async def insert(app):
+        return await insert_prefixes(app, prefixes, NullSigner(), keys['signer'], stapled_certs=keys['bundle'])
+
+    results, _ = benchmark(run, insert)
+    assert all(results)
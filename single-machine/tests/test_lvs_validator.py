@@ -0,0 +1,49 @@
+import os
+from ndn.encoding import Name
+from cert_util import get_signer_from_ndnd_key, read_ndnd_cert
+from lvs_validator import InsertionValidator
+from prefix_insertion_client import StapledCertBundle
+from conftest import APP_DIR, SIMULATOR_DIR
+
+SCHEMA = os.path.join(SIMULATOR_DIR, 'insert.tlv')
+
+
+def test_keygen_chain_is_accepted(keys):
+    validator = InsertionValidator.from_file(SCHEMA, trust_anchors=[keys['anchor']])
+    signer, bundle = keys['signer'], keys['bundle']
+
+    assert validator.check_chain(bundle)
+    assert validator.check_insertion('/minindn/n1/app', signer.key_locator_name, bundle)
+    assert validator.check_insertion('/minindn/n1', signer.key_locator_name, bundle)
+    assert not validator.check_insertion('/minindn/n2/app', signer.key_locator_name, bundle)
+    assert validator.invalid_prefixes(['/minindn/n1/a', '/minindn/n2/a'], signer.key_locator_name,
+                                      bundle) == [Name.from_str('/minindn/n2/a')]
+
+
+def test_chain_to_unknown_root_is_rejected(keys):
+    validator = InsertionValidator.from_file(SCHEMA)
+
+    # The insert certificate names the root key, and no certificate of that key is known
+    assert not validator.check_chain(keys['bundle'])
+    assert not validator.check_insertion('/minindn/n1/app', keys['signer'].key_locator_name, keys['bundle'])
+
+
+def test_chain_for_another_node_is_rejected(keys):
+    certs = keys['certs']
+    validator = InsertionValidator.from_file(SCHEMA, trust_anchors=[keys['anchor']])
+
+    assert not validator.check_chain(StapledCertBundle([certs['other-client'], certs['insert']]))
+
+
+def test_demo_certificates():
+    foo_cert = read_ndnd_cert(os.path.join(APP_DIR, 'ndnd-keys', 'foo.cert'))['cert_data']
+    bar_cert = read_ndnd_cert(os.path.join(APP_DIR, 'personal-keys', 'bar.cert'))['cert_data']
+    signer = get_signer_from_ndnd_key(os.path.join(APP_DIR, 'personal-keys', 'bar.key'),
+                                      os.path.join(APP_DIR, 'personal-keys', 'bar.cert'))
+    validator = InsertionValidator.from_file(os.path.join(APP_DIR, 'schema', 'insert.tlv'),
+                                             trust_anchors=[foo_cert])
+    bundle = StapledCertBundle([bar_cert])
+
+    assert validator.check_insertion('/foo/bar/baz', signer.key_locator_name)
+    assert validator.check_insertion('/foo/bar/baz', signer.key_locator_name, bundle)
+    assert not validator.check_insertion('/foo/bar/qux', signer.key_locator_name, bundle)
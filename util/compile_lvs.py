@@ -1,17 +1,101 @@
 import argparse
+import hashlib
+import importlib.metadata
+import os
+import shutil
 import ndn.app_support.light_versec
 import sys
 
-def process_files(input_file_path, output_file_path):
-    try:
+CACHE_DIR = os.environ.get('LVS_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'compile_lvs'))
+
+# Decoded models of schemas already loaded by this process, by cache key
+_models: dict[str, ndn.app_support.light_versec.LvsModel] = {}
+
+
+def cache_key(lvs_text: str) -> str:
+    """
+    Content hash of a schema source, including the compiler version so an upgrade recompiles
+    """
+    h = hashlib.sha256()
+    h.update(f'{importlib.metadata.version("python-ndn")}/{ndn.app_support.light_versec.VERSION}\0'.encode())
+    h.update(lvs_text.encode())
+    return h.hexdigest()[:32]
+
+
+def compiled_path(input_file_path: str, cache_dir: str = CACHE_DIR) -> str:
+    """
+    Path of the compiled TLV for an LVS file in the cache, compiling it only if its content
+    has not been compiled before.
+    """
+    with open(input_file_path, "r") as infile:
+        lvs_text = infile.read()
+
+    path = os.path.join(cache_dir, f'{cache_key(lvs_text)}.tlv')
+    if not os.path.exists(path):
+        wire = ndn.app_support.light_versec.compile_lvs(lvs_text).encode()
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, "wb") as outfile:
+            outfile.write(wire)
+        os.replace(tmp_path, path)
+    return path
+
+
+def load_model(path: str, cache_dir: str = CACHE_DIR) -> ndn.app_support.light_versec.LvsModel:
+    """
+    Decoded LVS model of an .lvs source (compiled through the cache) or a compiled .tlv file
+    """
+    if not path.endswith('.tlv'):
+        path = compiled_path(path, cache_dir)
+    with open(path, "rb") as f:
+        wire = f.read()
+    key = hashlib.sha256(wire).hexdigest()
+    if key not in _models:
+        _models[key] = ndn.app_support.light_versec.LvsModel.parse(wire)
+    return _models[key]
+
+
+def compile_file(input_file_path: str, output_file_path: str, cache_dir: str = CACHE_DIR, force: bool = False) -> bool:
+    """
+    Write the compiled TLV for an LVS file. Returns False if the input was already compiled
+    and the output is up to date, in which case nothing is written.
+    """
+    if force:
         with open(input_file_path, "r") as infile:
             lvs_text = infile.read()
+        path = os.path.join(cache_dir, f'{cache_key(lvs_text)}.tlv')
+        if os.path.exists(path):
+            os.remove(path)
+    path = compiled_path(input_file_path, cache_dir)
+
+    with open(path, "rb") as f:
+        wire = f.read()
+    if not force and os.path.exists(output_file_path):
+        with open(output_file_path, "rb") as f:
+            if f.read() == wire:
+                return False
+    shutil.copyfile(path, output_file_path)
+    return True
 
-        lvs_model = ndn.app_support.light_versec.compile_lvs(lvs_text)
 
-        with open(output_file_path, "wb") as outfile:
-            outfile.write(lvs_model.encode())
+def compile_dir(input_dir: str, output_dir: str = None, cache_dir: str = CACHE_DIR, force: bool = False) -> dict[str, bool]:
+    """
+    Compile every .lvs file in a directory to <output_dir>/<name>.tlv (next to the sources by default).
+    Returns whether each output was (re)written.
+    """
+    output_dir = output_dir or input_dir
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    for name in sorted(os.listdir(input_dir)):
+        if name.endswith('.lvs'):
+            output = os.path.join(output_dir, name[:-len('.lvs')] + '.tlv')
+            results[output] = compile_file(os.path.join(input_dir, name), output, cache_dir, force)
+    return results
 
+
+def process_files(input_file_path, output_file_path):
+    try:
+        compile_file(input_file_path, output_file_path)
     except FileNotFoundError:
         print(f"Error: The file '{input_file_path}' was not found.")
     except Exception as e:
@@ -26,6 +110,7 @@ Examples:
   python your_script_name.py --input ./schema/insert.lvs --output ./schema/insert.tlv
   python your_script_name.py -i input.lvs -o output.tlv
   python your_script_name.py (this will run in interactive mode)
+  python your_script_name.py --dir ./schema (compile every .lvs file, skipping unchanged ones)
 """
     )
     parser.add_argument(
@@ -39,8 +124,34 @@ Examples:
         help="Path for the output TLV file (e.g., ./schema/insert.tlv)"
     )
 
+    parser.add_argument(
+        "-d", "--dir",
+        dest="input_dir",
+        help="Compile every .lvs file in this directory without prompting"
+    )
+    parser.add_argument(
+        "--out-dir",
+        dest="output_dir",
+        help="Output directory for --dir (default: the input directory)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=CACHE_DIR,
+        help=f"Cache of compiled schemas by content hash (default: {CACHE_DIR}, or $LVS_CACHE_DIR)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Recompile even if the cache has the schema"
+    )
+
     args = parser.parse_args()
 
+    if args.input_dir:
+        for output, written in compile_dir(args.input_dir, args.output_dir, args.cache_dir, args.force).items():
+            print(f"{output}: {'written' if written else 'up to date'}")
+        return
+
     input_file = args.input_file
     output_file = args.output_file
 